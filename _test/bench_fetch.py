@@ -0,0 +1,68 @@
+"""
+读取参数基准：同一查询分别以驱动默认值与调优后的 fetch_size / stream_results / prefetch_rows 执行并计时
+
+用法:
+    python _test/bench_fetch.py --db-type oracle --host 127.0.0.1 --port 1521 --database FREEPDB1 \\
+        --username scott --password tiger --sql "SELECT * FROM big_table" --fetch-sizes 100,1000,5000
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.alchemy_db_client import execute_sql
+
+
+def run(args, repeat: int, **fetch_options) -> tuple[float, int]:
+    """返回最快一次的耗时（秒）与行数"""
+    best, rows = float('inf'), 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = execute_sql(
+            db_type=args.db_type,
+            host=args.host,
+            port=args.port,
+            database=args.database,
+            username=args.username,
+            password=args.password,
+            sql=args.sql,
+            result_shape='columns',
+            **fetch_options
+        )
+        best = min(best, time.perf_counter() - start)
+        rows = len(result['rows']) if isinstance(result, dict) and 'rows' in result else 0
+    return best, rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db-type', required=True, choices=['mysql', 'postgresql', 'sqlserver', 'oracle'])
+    parser.add_argument('--host', required=True)
+    parser.add_argument('--port', type=int, required=True)
+    parser.add_argument('--database', required=True)
+    parser.add_argument('--username', required=True)
+    parser.add_argument('--password', required=True)
+    parser.add_argument('--sql', required=True)
+    parser.add_argument('--fetch-sizes', default='100,1000,5000')
+    parser.add_argument('--prefetch-rows', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # 预热连接池，排除建立连接的耗时
+    run(args, 1)
+    baseline, rows = run(args, args.repeat)
+    print(f"{'配置':<36}{'耗时(s)':>10}{'行数':>10}{'相对默认':>10}")
+    print(f"{'默认':<36}{baseline:>10.3f}{rows:>10}{1:>10.2f}")
+
+    for size in (int(s) for s in args.fetch_sizes.split(',') if s.strip()):
+        for stream in (False, True):
+            options = {'fetch_size': size, 'stream_results': stream, 'prefetch_rows': args.prefetch_rows}
+            elapsed, rows = run(args, args.repeat, **options)
+            label = f"fetch_size={size}" + (" stream" if stream else "")
+            print(f"{label:<36}{elapsed:>10.3f}{rows:>10}{baseline / elapsed:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""
+插件启动耗时测量：在子进程中以 -X importtime 导入工具模块，输出总耗时与最慢的模块
+
+用法: python _test/bench_startup.py [--top 15] [--modules tools.rookie_excute_sql,tools.rookie_text2data]
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_MODULES = 'tools.rookie_excute_sql,tools.rookie_text2data'
+
+
+def measure(modules: list[str]) -> list[tuple[int, int, str]]:
+    """返回 (自身耗时us, 累计耗时us, 模块名) 列表"""
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise SystemExit(proc.stderr.strip().splitlines()[-1])
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        # 去掉分隔符后的一个空格，嵌套导入以缩进表示
+        entries.append((int(self_us), int(cumulative_us), name.rstrip()[1:]))
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--modules', default=DEFAULT_MODULES)
+    args = parser.parse_args()
+
+    modules = [m.strip() for m in args.modules.split(',') if m.strip()]
+    entries = measure(modules)
+    top_level = [e for e in entries if not e[2].startswith(' ')]
+    total = sum(e[1] for e in top_level)
+    loaded = {e[2].strip() for e in entries}
+
+    print(f"导入 {', '.join(modules)}: {total / 1000:.1f} ms, {len(entries)} 个模块")
+    for heavy in ('sqlalchemy', 'jinja2', 'pymysql', 'psycopg2', 'pymssql', 'oracledb', 'cx_Oracle'):
+        print(f"  {heavy:<12} {'已加载' if heavy in loaded else '未加载'}")
+    print(f"累计耗时最长的 {args.top} 个模块:")
+    for self_us, cumulative_us, name in sorted(entries, key=lambda e: -e[1])[:args.top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {self_us / 1000:7.1f} ms  {name.strip()}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""
+准入控制的行为测试：排队、拒绝与排队超时
+
+用法: python -m pytest _test/test_admission.py 或 python _test/test_admission.py
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.admission import AdmissionRejected, TargetLimiter
+
+
+def _expect(exc_type, func, *args):
+    try:
+        func(*args)
+    except exc_type as e:
+        return e
+    raise AssertionError(f"{func.__name__} 未抛出 {exc_type.__name__}")
+
+
+def test_limiter_queues_then_rejects():
+    limiter = TargetLimiter(max_concurrency=1, max_queue=1, queue_timeout=1.0)
+    assert limiter.acquire() == 0.0
+
+    waited = []
+    waiter = threading.Thread(target=lambda: waited.append(limiter.acquire()))
+    waiter.start()
+    time.sleep(0.05)
+    # 队列已满，第三个请求立即被拒绝
+    _expect(AdmissionRejected, limiter.acquire)
+
+    limiter.release()
+    waiter.join()
+    assert waited and waited[0] > 0
+    limiter.release()
+
+    stats = limiter.stats()
+    assert stats['admitted'] == 2 and stats['rejected'] == 1
+    assert stats['running'] == 0 and stats['waiting'] == 0
+
+
+def test_limiter_times_out_queued_request():
+    limiter = TargetLimiter(max_concurrency=1, max_queue=4, queue_timeout=0.05)
+    limiter.acquire()
+    _expect(AdmissionRejected, limiter.acquire)
+    limiter.release()
+    assert limiter.stats()['timed_out'] == 1
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"{name}: ok")
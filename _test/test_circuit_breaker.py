@@ -0,0 +1,93 @@
+"""
+熔断器的行为测试
+
+用法: python -m pytest _test/test_circuit_breaker.py 或 python _test/test_circuit_breaker.py
+"""
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy.exc import OperationalError
+
+from utils.circuit_breaker import CircuitBreaker, DatabaseUnavailableError, is_connect_failure
+
+KEY = ('mysql', 'db1', 3306, 'shop')
+
+
+class _DriverError(Exception):
+    pass
+
+
+def _operational(*args) -> OperationalError:
+    return OperationalError('connect', {}, _DriverError(*args))
+
+
+def _expect(exc_type, func, *args):
+    try:
+        func(*args)
+    except exc_type as e:
+        return e
+    raise AssertionError(f"{func.__name__} 未抛出 {exc_type.__name__}")
+
+
+def test_breaker_opens_backs_off_and_resets():
+    breaker = CircuitBreaker(base_backoff=0.05, max_backoff=0.15)
+    breaker.check(KEY)
+    assert not breaker.is_open(KEY)
+
+    breaker.record_failure(KEY, DatabaseUnavailableError("connection refused"))
+    assert breaker.is_open(KEY)
+    _expect(DatabaseUnavailableError, breaker.check, KEY)
+    # 其他目标不受影响
+    breaker.check(('mysql', 'db2', 3306, 'shop'))
+
+    time.sleep(0.06)
+    assert not breaker.is_open(KEY)
+
+    # 连续失败时退避翻倍，但不超过上限
+    breaker.record_failure(KEY, DatabaseUnavailableError("connection refused"))
+    breaker.record_failure(KEY, DatabaseUnavailableError("connection refused"))
+    time.sleep(0.06)
+    assert breaker.is_open(KEY)
+
+    breaker.record_success(KEY)
+    assert not breaker.is_open(KEY)
+    breaker.check(KEY)
+
+
+def test_breaker_does_not_echo_previous_error():
+    breaker = CircuitBreaker(base_backoff=10, max_backoff=10)
+    breaker.record_failure(KEY, DatabaseUnavailableError("alice: secret detail"))
+    error = _expect(DatabaseUnavailableError, breaker.check, KEY)
+    assert 'alice' not in str(error)
+
+
+def test_only_network_failures_trip_the_breaker():
+    network = [
+        _operational(2003, "Can't connect to MySQL server on 'db1' ([Errno 111] Connection refused)"),
+        _operational('connection to server at "db1", port 5432 failed: timeout expired'),
+        _operational(20009, b'Unable to connect: Adaptive Server is unavailable or does not exist (db1)'),
+        _operational('DPY-6005: cannot connect to database.'),
+        OperationalError('connect', {}, ConnectionRefusedError(111, 'Connection refused')),
+    ]
+    caller_errors = [
+        _operational(1045, "Access denied for user 'alice'@'10.0.0.1' (using password: YES)"),
+        _operational(1049, "Unknown database 'shop2'"),
+        _operational('FATAL:  password authentication failed for user "alice"'),
+        _operational('FATAL:  database "shop2" does not exist'),
+        _operational(18456, b"Login failed for user 'sa'. Adaptive Server connection failed"),
+        _operational('ORA-01017: invalid credential or not authorized; logon denied'),
+    ]
+    for error in network:
+        assert is_connect_failure(error), error
+    for error in caller_errors:
+        assert not is_connect_failure(error), error
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,131 @@
+"""
+执行计划摘要的行为测试：从各数据库记录下来的 EXPLAIN 输出提取预估行数、代价与全表扫描
+
+用法: python -m pytest _test/test_explain.py 或 python _test/test_explain.py
+"""
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.explain import (
+    _summarize_mysql, _summarize_oracle, _summarize_postgresql, _summarize_sqlserver, check_plan
+)
+
+# MySQL 8.0: EXPLAIN FORMAT=JSON SELECT o.id, u.name FROM orders o JOIN users u ON u.id = o.user_id
+MYSQL_PLAN = json.loads("""
+{
+  "query_block": {
+    "select_id": 1,
+    "cost_info": {"query_cost": "1245.60"},
+    "nested_loop": [
+      {"table": {"table_name": "o", "access_type": "ALL", "rows_examined_per_scan": 10120,
+                 "rows_produced_per_join": 10120, "filtered": "100.00",
+                 "cost_info": {"read_cost": "21.00", "eval_cost": "1012.00", "prefix_cost": "1033.00"}}},
+      {"table": {"table_name": "u", "access_type": "eq_ref", "possible_keys": ["PRIMARY"],
+                 "key": "PRIMARY", "used_key_parts": ["id"], "rows_examined_per_scan": 1,
+                 "rows_produced_per_join": 10120, "filtered": "100.00"}}
+    ]
+  }
+}
+""")
+
+# PostgreSQL 15: EXPLAIN (FORMAT JSON) SELECT ... FROM orders o JOIN users u ON u.id = o.user_id WHERE o.status = 'paid'
+POSTGRESQL_PLAN = json.loads("""
+[
+  {
+    "Plan": {
+      "Node Type": "Hash Join", "Join Type": "Inner", "Startup Cost": 35.5, "Total Cost": 412.75,
+      "Plan Rows": 2500, "Plan Width": 40, "Hash Cond": "(o.user_id = u.id)",
+      "Plans": [
+        {"Node Type": "Seq Scan", "Parent Relationship": "Outer", "Relation Name": "orders",
+         "Alias": "o", "Startup Cost": 0.0, "Total Cost": 352.0, "Plan Rows": 2500,
+         "Filter": "((status)::text = 'paid'::text)"},
+        {"Node Type": "Hash", "Parent Relationship": "Inner", "Plan Rows": 1000,
+         "Plans": [
+           {"Node Type": "Index Scan", "Parent Relationship": "Outer", "Scan Direction": "Forward",
+            "Index Name": "users_pkey", "Relation Name": "users", "Alias": "u",
+            "Total Cost": 23.0, "Plan Rows": 1000}
+         ]}
+      ]
+    }
+  }
+]
+""")
+
+# SQL Server 2019: SET SHOWPLAN_XML ON; SELECT o.id FROM dbo.orders o JOIN dbo.users u ON u.id = o.user_id
+SQLSERVER_PLAN = """<ShowPlanXML xmlns="http://schemas.microsoft.com/sqlserver/2004/07/showplan" Version="1.564" Build="15.0.2000.5">
+  <BatchSequence><Batch><Statements>
+    <StmtSimple StatementText="SELECT o.id FROM dbo.orders o JOIN dbo.users u ON u.id = o.user_id"
+                StatementId="1" StatementType="SELECT" StatementSubTreeCost="0.842" StatementEstRows="5000">
+      <QueryPlan>
+        <RelOp NodeId="0" PhysicalOp="Hash Match" LogicalOp="Inner Join" EstimateRows="5000">
+          <Hash>
+            <RelOp NodeId="1" PhysicalOp="Clustered Index Scan" LogicalOp="Clustered Index Scan"
+                   EstimateRows="5000" EstimatedRowsRead="5000">
+              <IndexScan Ordered="false">
+                <Object Database="[shop]" Schema="[dbo]" Table="[orders]" Index="[PK_orders]" Alias="[o]"/>
+              </IndexScan>
+            </RelOp>
+            <RelOp NodeId="2" PhysicalOp="Clustered Index Seek" LogicalOp="Clustered Index Seek"
+                   EstimateRows="1" EstimatedRowsRead="1">
+              <IndexScan Ordered="true">
+                <Object Database="[shop]" Schema="[dbo]" Table="[users]" Index="[PK_users]" Alias="[u]"/>
+              </IndexScan>
+            </RelOp>
+          </Hash>
+        </RelOp>
+      </QueryPlan>
+    </StmtSimple>
+  </Statements></Batch></BatchSequence>
+</ShowPlanXML>"""
+
+# Oracle 19c: PLAN_TABLE 中的 (id, operation, options, object_name, cost, cardinality)
+ORACLE_PLAN = [
+    (0, 'SELECT STATEMENT', None, None, 69, 4000),
+    (1, 'HASH JOIN', None, None, 69, 4000),
+    (2, 'TABLE ACCESS', 'FULL', 'USERS', 5, 1000),
+    (3, 'TABLE ACCESS', 'FULL', 'ORDERS', 63, 4000),
+]
+
+
+def test_mysql_plan():
+    summary = _summarize_mysql(MYSQL_PLAN)
+    assert summary == {'estimated_rows': 10121.0, 'estimated_cost': 1245.6, 'full_scans': ['o']}
+
+
+def test_postgresql_plan():
+    summary = _summarize_postgresql(POSTGRESQL_PLAN)
+    assert summary == {'estimated_rows': 3500.0, 'estimated_cost': 412.75, 'full_scans': ['orders']}
+
+
+def test_sqlserver_plan():
+    summary = _summarize_sqlserver(SQLSERVER_PLAN)
+    assert summary['estimated_rows'] == 5001.0
+    assert summary['estimated_cost'] == 0.842
+    assert summary['full_scans'] == ['orders']
+
+
+def test_oracle_plan():
+    summary = _summarize_oracle(ORACLE_PLAN)
+    assert summary == {'estimated_rows': 5000.0, 'estimated_cost': 69.0, 'full_scans': ['USERS', 'ORDERS']}
+
+
+def test_check_plan_thresholds():
+    summary = _summarize_mysql(MYSQL_PLAN)
+    assert check_plan(summary) == []
+    assert check_plan(summary, max_rows=1e6, max_cost=1e4) == []
+    violations = check_plan(summary, max_rows=1000, max_cost=100, block_full_scan=True)
+    assert violations == [
+        '预估扫描行数 10121 超过阈值 1000',
+        '预估代价 1245.60 超过阈值 100.00',
+        '存在全表扫描: o'
+    ]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"{name}: ok")
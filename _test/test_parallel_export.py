@@ -0,0 +1,76 @@
+"""
+并行导出的行为测试：编码进程的输出与单线程导出一致，批次按提交顺序写出
+
+用法: python -m pytest _test/test_parallel_export.py 或 python _test/test_parallel_export.py
+"""
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from io import BytesIO
+from pathlib import Path
+from uuid import UUID
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.parallel_export import ParallelEncoder
+
+COLUMNS = ['id', 'name', 'created_at', 'day', 'amount', 'note', 'raw', 'uid', 'extra']
+
+
+def _rows(count: int) -> list[tuple]:
+    return [
+        (i, f'名字,"{i}"', datetime(2024, 1, 2, 3, 4, 5), date(2024, 5, 6), Decimal('1.50'), None,
+         b'\xe4\xb8\xad', UUID(int=i), {'k': i})
+        for i in range(count)
+    ]
+
+
+def _export(fmt: str, rows: list[tuple], batch: int, workers: int = 2) -> bytes:
+    output = BytesIO()
+    encoder = ParallelEncoder(fmt, output.write, workers)
+    try:
+        for start in range(0, len(rows), batch):
+            encoder.feed(COLUMNS, rows[start:start + batch])
+        encoder.close()
+    finally:
+        encoder.shutdown()
+    return output.getvalue()
+
+
+def test_csv_matches_single_threaded_export():
+    data = _export('csv', _rows(2), batch=1).decode('utf-8-sig').splitlines()
+    assert data == [
+        'id,name,created_at,day,amount,note,raw,uid,extra',
+        '0,"名字,""0""",2024-01-02 03:04:05,2024-05-06 00:00:00,1.5,None,中,'
+        '00000000-0000-0000-0000-000000000000,{\'k\': 0}',
+        '1,"名字,""1""",2024-01-02 03:04:05,2024-05-06 00:00:00,1.5,None,中,'
+        '00000000-0000-0000-0000-000000000001,{\'k\': 1}',
+    ]
+
+
+def test_html_rows():
+    data = _export('html', _rows(1), batch=1).decode('utf-8')
+    assert data.startswith("<table class='table table-bordered table-striped'><thead><tr><th>id</th>")
+    assert "<tr><td>0</td><td>名字,\"0\"</td><td>2024-01-02 03:04:05</td>" in data
+    assert data.endswith("</tr></tbody></table>")
+
+
+def test_batches_keep_order():
+    rows = _rows(1000)
+    assert _export('csv', rows, batch=7, workers=3) == _export('csv', rows, batch=1000, workers=1)
+
+
+def test_encoding_error_is_reported():
+    try:
+        _export('csv', [(1, 2)], batch=1)
+    except ValueError as e:
+        assert "导出编码失败" in str(e)
+        return
+    raise AssertionError("字段数与列数不一致时未抛出 ValueError")
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"{name}: ok")
@@ -0,0 +1,97 @@
+"""
+本地结果缓存的行为测试：只读查询、会话隔离与淘汰
+
+用法: python -m pytest _test/test_result_cache.py 或 python _test/test_result_cache.py
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils import result_cache
+from utils.result_cache import CACHE_MARKER, ConversationCache, get_cache, is_cache_sql, store_result
+
+ROWS = [
+    {'id': 1, 'status': 'paid', 'amount': 10.5},
+    {'id': 2, 'status': 'open', 'amount': 3.0},
+    {'id': 3, 'status': 'paid', 'amount': 7.25},
+]
+
+
+def _cache() -> ConversationCache:
+    cache = ConversationCache()
+    cache.add("SELECT id, status, amount FROM orders", ROWS)
+    return cache
+
+
+def _rejected(cache: ConversationCache, sql: str) -> bool:
+    try:
+        cache.query(sql)
+    except ValueError:
+        return True
+    return False
+
+
+def test_select_and_with_are_allowed():
+    cache = _cache()
+    sql = f"{CACHE_MARKER} SELECT status, SUM(amount) AS total FROM r1 GROUP BY status ORDER BY status"
+    assert is_cache_sql(sql)
+    assert cache.query(sql) == [{'status': 'open', 'total': 3.0}, {'status': 'paid', 'total': 17.75}]
+    assert cache.query(
+        f"{CACHE_MARKER} WITH p AS (SELECT * FROM r1 WHERE status = :s) SELECT COUNT(*) AS n FROM p",
+        {'s': 'paid'}
+    ) == [{'n': 2}]
+
+
+def test_attach_and_writes_are_rejected():
+    cache = _cache()
+    target = os.path.join(tempfile.mkdtemp(), 'pwned.db')
+    statements = [
+        f"ATTACH DATABASE '{target}' AS p",
+        "CREATE TABLE x (a)",
+        "PRAGMA query_only = OFF",
+        "DELETE FROM r1",
+        "SELECT 1; DROP TABLE r1",
+        "WITH t AS (SELECT 1) INSERT INTO r1 SELECT 9, 'x', 0",
+        "SELECT * FROM pragma_table_info('r1')",
+    ]
+    for sql in statements:
+        assert _rejected(cache, f"{CACHE_MARKER} {sql}"), sql
+    assert not os.path.exists(target)
+    assert cache.query(f"{CACHE_MARKER} SELECT COUNT(*) AS n FROM r1") == [{'n': 3}]
+
+
+def test_cache_still_accepts_new_results_after_queries():
+    cache = _cache()
+    _rejected(cache, f"{CACHE_MARKER} CREATE TABLE x (a)")
+    cache.add("SELECT 1", [{'a': 1}])
+    assert list(cache.tables) == ['r1', 'r2']
+    cache.drop_oldest()
+    assert list(cache.tables) == ['r2']
+
+
+def test_conversations_are_isolated():
+    store_result('conv-a', "SELECT * FROM orders", ROWS)
+    assert get_cache('conv-a') is not None
+    assert get_cache('conv-b') is None
+    assert get_cache(None) is None
+
+
+def test_oldest_results_are_evicted():
+    original = result_cache.MAX_TABLES_PER_CONVERSATION
+    result_cache.MAX_TABLES_PER_CONVERSATION = 2
+    try:
+        for i in range(3):
+            store_result('conv-evict', f"SELECT {i}", [{'v': i}])
+        assert list(get_cache('conv-evict').tables) == ['r2', 'r3']
+    finally:
+        result_cache.MAX_TABLES_PER_CONVERSATION = original
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"{name}: ok")
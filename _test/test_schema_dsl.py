@@ -0,0 +1,98 @@
+"""
+表结构 DSL 的行为测试：主键、外键与索引标记
+
+用法: python -m pytest _test/test_schema_dsl.py 或 python _test/test_schema_dsl.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database_schema.formatter import format_schema_dsl
+from database_schema.model import Schema, build_table
+
+SCHEMA = Schema((
+    build_table(
+        'users', comment='用户',
+        columns=[
+            {'name': 'id', 'type': 'INTEGER', 'comment': '用户ID'},
+            {'name': 'email', 'type': 'VARCHAR'},
+        ],
+        primary_key=['id'],
+        indexes=[{'name': 'uk_users_email', 'columns': ['email'], 'unique': True}]
+    ),
+    build_table(
+        'orders', comment='订单',
+        columns=[
+            {'name': 'id', 'type': 'BIGINT'},
+            {'name': 'user_id', 'type': 'INTEGER'},
+            {'name': 'status', 'type': 'VARCHAR'},
+            {'name': 'created_at', 'type': 'DATETIME'},
+            {'name': 'payload', 'type': 'JSONB'},
+        ],
+        primary_key=['id'],
+        foreign_keys=[{'columns': ['user_id'], 'referred_table': 'users', 'referred_columns': ['id']}],
+        indexes=[
+            {'name': 'idx_orders_user_created', 'columns': ['user_id', 'created_at'], 'unique': False},
+            {'name': 'idx_orders_status', 'columns': ['status'], 'unique': False},
+        ]
+    ),
+))
+
+
+def test_keys_and_indexes():
+    assert format_schema_dsl(SCHEMA).splitlines() == [
+        "T:users(id:i:PK, email:s) U:uk_users_email(email)",
+        "T:orders(id:i:PK, user_id:i:FK>users.id, status:s, created_at:dt, payload:j) "
+        "I:idx_orders_user_created(user_id,created_at) I:idx_orders_status(status)",
+    ]
+
+
+def test_without_keys():
+    assert format_schema_dsl(SCHEMA, with_keys=False).splitlines() == [
+        "T:users(id:i, email:s)",
+        "T:orders(id:i, user_id:i, status:s, created_at:dt, payload:j)",
+    ]
+
+
+def test_comments_and_untyped():
+    assert format_schema_dsl(SCHEMA, with_type=False, with_comment=True).splitlines()[:2] == [
+        "# 用户",
+        "T:users(id:PK:# 用户ID, email) U:uk_users_email(email)",
+    ]
+
+
+def test_composite_foreign_key():
+    schema = Schema((
+        build_table(
+            'order_items',
+            comment=None,
+            columns=[{'name': 'order_id', 'type': 'INT'}, {'name': 'line_no', 'type': 'INT'}],
+            primary_key=['order_id', 'line_no'],
+            foreign_keys=[{'columns': ['order_id', 'line_no'], 'referred_table': 'order_lines',
+                           'referred_columns': ['oid', 'lno']}]
+        ),
+    ))
+    assert format_schema_dsl(schema) == (
+        "T:order_items(order_id:i:PK:FK>order_lines.oid, line_no:i:PK:FK>order_lines.lno)"
+    )
+
+
+def test_legacy_dict_schema():
+    assert format_schema_dsl(SCHEMA.to_dict()) == format_schema_dsl(SCHEMA)
+
+
+def test_missing_schema_is_an_error():
+    # 反射失败（None）不能被当作空表结构
+    try:
+        format_schema_dsl(None)
+    except ValueError:
+        return
+    raise AssertionError("format_schema_dsl(None) 未抛出 ValueError")
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"{name}: ok")
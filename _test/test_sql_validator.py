@@ -0,0 +1,122 @@
+"""
+SQL 本地校验的行为测试：合法语句不误报，引用不存在的表或字段时报错
+
+用法: python -m pytest _test/test_sql_validator.py 或 python _test/test_sql_validator.py
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database_schema.model import Schema, build_table
+from utils.sql_validator import is_read_only_sql, validate_sql
+
+SCHEMA = Schema((
+    build_table('orders', comment='订单', columns=[
+        {'name': 'id', 'type': 'INTEGER'},
+        {'name': 'user_id', 'type': 'INTEGER'},
+        {'name': 'status', 'type': 'VARCHAR'},
+        {'name': 'amount', 'type': 'DECIMAL'},
+        {'name': 'created_at', 'type': 'DATETIME'},
+    ]),
+    build_table('users', comment='用户', columns=[
+        {'name': 'id', 'type': 'INTEGER'},
+        {'name': 'name', 'type': 'VARCHAR'},
+        {'name': 'Order Count', 'type': 'INTEGER'},
+    ]),
+))
+
+# 合法语句：不应报错
+VALID = [
+    ("SELECT id, status FROM orders WHERE status = 'paid' LIMIT 100", 'mysql'),
+    ("SELECT o.id, u.name FROM orders o JOIN users AS u ON u.id = o.user_id", 'mysql'),
+    ("SELECT status, SUM(amount) AS total FROM orders GROUP BY status ORDER BY total DESC", 'mysql'),
+    ("SELECT COUNT(*) FROM orders WHERE status = :p_status AND amount > :p_min", 'postgresql'),
+    ("SELECT EXTRACT(YEAR FROM created_at) AS y, amount::numeric FROM orders", 'postgresql'),
+    ("WITH paid (uid, total) AS (SELECT user_id, SUM(amount) FROM orders GROUP BY user_id) "
+     "SELECT u.name, p.total FROM users u JOIN paid p ON p.uid = u.id", 'postgresql'),
+    ("SELECT t.user_id, t.cnt FROM (SELECT user_id, COUNT(*) AS cnt FROM orders GROUP BY user_id) t "
+     "WHERE t.cnt > 3", 'mysql'),
+    ("SELECT id, ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY created_at DESC) AS rn FROM orders", 'postgresql'),
+    ("SELECT \"Order Count\" FROM users", 'postgresql'),
+    ("SELECT `Order Count` FROM users", 'mysql'),
+    ("SELECT TOP 10 [id], [status] FROM orders WITH (NOLOCK)", 'sqlserver'),
+    ("SELECT id FROM orders WHERE status IN ('select name from secret', 'x') -- name 在注释里", 'mysql'),
+    ("SELECT id FROM orders WHERE EXISTS (SELECT 1 FROM users WHERE users.id = orders.user_id)", 'mysql'),
+    ("SELECT table_name FROM information_schema.tables", 'mysql'),
+    ("SELECT SYSDATE FROM dual", 'oracle'),
+    ("SELECT id FROM orders FETCH FIRST 10 ROWS ONLY", 'oracle'),
+    # SQL Server 的日期部分名与 PostgreSQL 的数组构造
+    ("SELECT DATEPART(weekday, created_at), DATEPART(iso_week, created_at) FROM orders", 'sqlserver'),
+    ("SELECT DATEDIFF(nanosecond, created_at, GETDATE()), DATEADD(ns, 1, created_at) FROM orders", 'sqlserver'),
+    ("SELECT DATEPART(tzoffset, created_at), DATEPART(mcs, created_at) FROM orders", 'sqlserver'),
+    ("SELECT id FROM orders WHERE status = ANY(ARRAY['a','b'])", 'postgresql'),
+    ("SELECT (ARRAY[id, user_id])[1] FROM orders WHERE status = ANY(ARRAY[:p1, :p2])", 'postgresql'),
+    ("SELECT EXTRACT(ISOYEAR FROM created_at) FROM orders", 'postgresql'),
+]
+
+# 非法语句：应报出对应的错误
+INVALID = [
+    ("SELECT id FROM order_items", 'mysql', '表 order_items 不存在'),
+    ("SELECT id, price FROM orders", 'mysql', '字段 price 不存在于引用的表中'),
+    ("SELECT o.price FROM orders o", 'mysql', '字段 o.price 不存在于表 orders'),
+    ("SELECT x.id FROM orders o", 'mysql', '未知的表或别名 x'),
+    ("SELECT u.email FROM orders o JOIN users u ON u.id = o.user_id", 'postgresql', '字段 u.email 不存在于表 users'),
+    ("SELECT id FROM orders WHERE state = 'paid'", 'postgresql', '字段 state 不存在于引用的表中'),
+    ("SELECT \"order count\" FROM users WHERE nickname IS NULL", 'postgresql', '字段 nickname 不存在于引用的表中'),
+    ("SELECT id FROM orders WHERE status = ANY(ARRAY[state])", 'postgresql', '字段 state 不存在于引用的表中'),
+    ("SELECT [price] FROM orders", 'sqlserver', '字段 price 不存在于引用的表中'),
+]
+
+
+def test_valid_sql_has_no_false_positives():
+    for sql, db_type in VALID:
+        assert validate_sql(sql, SCHEMA, db_type) == [], sql
+
+
+def test_invalid_sql_is_reported():
+    for sql, db_type, expected in INVALID:
+        errors = validate_sql(sql, SCHEMA, db_type)
+        assert any(expected in error for error in errors), (sql, errors)
+
+
+def test_legacy_dict_schema_is_accepted():
+    assert validate_sql("SELECT id FROM orders", SCHEMA.to_dict(), 'mysql') == []
+    assert validate_sql("SELECT nope FROM orders", SCHEMA.to_dict(), 'mysql')
+
+
+def test_unknown_table_does_not_flag_every_column():
+    # 表不存在时无法校验字段，只报告表本身
+    assert validate_sql("SELECT a, b, c FROM missing", SCHEMA, 'mysql') == ['表 missing 不存在']
+
+
+def test_read_only_statements():
+    for sql, db_type in [
+        ("SELECT id FROM orders WHERE status = 'delete';", 'mysql'),
+        ("WITH t AS (SELECT 1 AS x) SELECT x FROM t", 'postgresql'),
+        ("SELECT \"update\" FROM orders -- ; DROP TABLE orders", 'postgresql'),
+        ("SHOW TABLES", 'mysql'),
+    ]:
+        assert is_read_only_sql(sql, db_type), sql
+
+
+def test_write_statements_are_rejected():
+    for sql, db_type in [
+        ("SELECT 1; COMMIT; DROP TABLE orders", 'postgresql'),
+        ("EXPLAIN ANALYZE DELETE FROM orders", 'postgresql'),
+        ("WITH d AS (DELETE FROM orders RETURNING *) SELECT * FROM d", 'postgresql'),
+        ("SELECT * INTO orders_copy FROM orders", 'sqlserver'),
+        ("SELECT id FROM orders FOR UPDATE", 'mysql'),
+        ("SELECT 'x\\''; DROP TABLE orders; -- '", 'mysql'),
+        ("SELECT 1 /*!; DROP TABLE orders */", 'mysql'),
+        ("UPDATE orders SET status = 'paid'", 'mysql'),
+        ("", 'mysql'),
+    ]:
+        assert not is_read_only_sql(sql, db_type), sql
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith('test_'):
+            func()
+            print(f"{name}: ok")
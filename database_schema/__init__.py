@@ -1,6 +1,22 @@
 # database_schema/__init__.py
-from .factory import InspectorFactory
-from .connector import get_db_schema
-from .formatter import format_schema_dsl
+# 按需导入：仅使用表结构模型或格式化时不加载 SQLAlchemy
+from importlib import import_module
 
-__all__ = ['InspectorFactory', 'get_db_schema', 'format_schema_dsl']
\ No newline at end of file
+_EXPORTS = {
+    'InspectorFactory': '.factory',
+    'get_db_schema': '.connector',
+    'format_schema_dsl': '.formatter',
+    'Schema': '.model',
+    'Table': '.model',
+    'Column': '.model',
+    'as_schema': '.model'
+}
+
+__all__ = ['InspectorFactory', 'get_db_schema', 'format_schema_dsl',
+           'Schema', 'Table', 'Column', 'as_schema']
+
+
+def __getattr__(name: str):
+    if name in _EXPORTS:
+        return getattr(import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
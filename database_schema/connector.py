@@ -2,6 +2,8 @@
 from sqlalchemy import inspect
 from sqlalchemy.engine import Engine
 from .factory import InspectorFactory
+from .model import Schema, build_table
+from utils.replica_router import route_call
 
 def get_db_schema(
     db_type: str,
@@ -11,11 +13,37 @@ def get_db_schema(
     username: str,
     password: str,
     table_names: str | None = None,
-    schema_name: str | None = None
-) -> dict | None:
+    schema_name: str | None = None,
+    connect_timeout: float | None = None,
+    read_timeout: float | None = None,
+    routing_policy: str | None = None
+) -> Schema | None:
     """
     获取数据库表结构信息
+
+    host 支持逗号分隔的多个只读节点，按 routing_policy 选择节点并自动故障转移
     """
+    return route_call(
+        db_type, host, port, database,
+        lambda node, node_port: _reflect_schema(
+            db_type, node, node_port, database, username, password,
+            table_names, schema_name, connect_timeout, read_timeout
+        ),
+        policy=routing_policy
+    )
+
+def _reflect_schema(
+    db_type: str,
+    host: str,
+    port: int,
+    database: str,
+    username: str,
+    password: str,
+    table_names: str | None = None,
+    schema_name: str | None = None,
+    connect_timeout: float | None = None,
+    read_timeout: float | None = None
+) -> Schema | None:
     engine: Engine | None = None
     
     inspector = InspectorFactory.create_inspector(
@@ -25,7 +53,9 @@ def get_db_schema(
         database=database,
         username=username,
         password=password,
-        schema_name=schema_name
+        schema_name=schema_name,
+        connect_timeout=connect_timeout,
+        read_timeout=read_timeout
     )
     try:    
         engine = inspector.engine
@@ -39,8 +69,14 @@ def get_db_schema(
             else all_tables
         )
         target_tables = [t for t in target_tables if t in all_tables]
+
+        try:
+            table_keys = inspector.get_table_keys(inspector_obj, target_tables)
+        except Exception as e:
+            print(f"Failed to get keys and indexes: {str(e)}")
+            table_keys = {}
         
-        result = {}
+        tables = []
         for table in target_tables:
             try:
                 table_comment = inspector.get_table_comment(inspector_obj, table)
@@ -68,11 +104,16 @@ def get_db_schema(
                     'comment': col_comment
                 })
             
-            result[table] = {
-                'comment': table_comment,
-                'columns': columns
-            }
-        return result
+            keys = table_keys.get(table, {})
+            tables.append(build_table(
+                table,
+                comment=table_comment,
+                columns=columns,
+                primary_key=keys.get('primary_key'),
+                foreign_keys=keys.get('foreign_keys'),
+                indexes=keys.get('indexes')
+            ))
+        return Schema(tuple(tables))
         # 应该在这里
     except Exception as e:
         print(f"Database connection failed: {str(e)}")
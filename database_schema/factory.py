@@ -1,24 +1,25 @@
 # database_schema/factory.py
-from database_schema.inspectors import (
-    MySQLInspector,
-    SQLServerInspector,
-    PostgreSQLInspector,
-    OracleInspector
-)
+from importlib import import_module
+
 
 class InspectorFactory:
+    # 数据库类型 -> (模块, 检查器类)，创建时才导入对应模块
+    INSPECTORS = {
+        'mysql': ('database_schema.inspectors.mysql', 'MySQLInspector'),
+        'sqlserver': ('database_schema.inspectors.sqlserver', 'SQLServerInspector'),
+        'postgresql': ('database_schema.inspectors.postgresql', 'PostgreSQLInspector'),
+        'oracle': ('database_schema.inspectors.oracle', 'OracleInspector')
+    }
+
     @staticmethod
-    def create_inspector(db_type: str, **kwargs) -> object:
-        """创建数据库检查器实例（绝对路径导入版）"""
+    def get_inspector_class(db_type: str) -> type:
         db_type = db_type.lower().strip()
-        mapping = {
-            'mysql': MySQLInspector,
-            'sqlserver': SQLServerInspector,
-            'postgresql': PostgreSQLInspector,
-            'oracle': OracleInspector
-        }
-        
-        if db_type not in mapping:
+        if db_type not in InspectorFactory.INSPECTORS:
             raise ValueError(f"Unsupported database type: {db_type}")
-            
-        return mapping[db_type](**kwargs)
\ No newline at end of file
+        module_name, class_name = InspectorFactory.INSPECTORS[db_type]
+        return getattr(import_module(module_name), class_name)
+
+    @staticmethod
+    def create_inspector(db_type: str, **kwargs) -> object:
+        """创建数据库检查器实例（绝对路径导入版）"""
+        return InspectorFactory.get_inspector_class(db_type)(**kwargs)
@@ -1,6 +1,13 @@
-def format_schema_dsl(schema: dict, with_type: bool = True, with_comment: bool = False) -> str:
+from .model import Schema, as_schema
+
+
+def format_schema_dsl(schema: Schema | dict, with_type: bool = True, with_comment: bool = False,
+                      with_keys: bool = True) -> str:
     """
     将数据库表结构格式化为DSL
+
+    with_keys 为 True 时输出键与索引：
+    字段后追加 PK / FK>引用表.引用字段，表行后追加 I:索引名(字段,...) 与 U:唯一索引名(字段,...)
     """
     type_aliases = {
         # 通用类型
@@ -24,29 +31,49 @@ def format_schema_dsl(schema: dict, with_type: bool = True, with_comment: bool =
     }
     
     lines = []
-    for table_name, table_data in schema.items():
+    for table_name, table_data in as_schema(schema).items():
         column_parts = []
         
         # 处理表注释
-        if with_comment and (table_comment := table_data.get('comment', '')):
+        if with_comment and (table_comment := table_data.comment):
             lines.append(f"# {table_comment}")
         
+        # 处理键
+        primary_key = set(table_data.primary_key) if with_keys else set()
+        foreign_keys = {}
+        if with_keys:
+            for fk in table_data.foreign_keys:
+                for col, ref_col in zip(fk.columns, fk.referred_columns):
+                    foreign_keys[col] = f"FK>{fk.referred_table}.{ref_col}"
+        
         # 处理字段
-        for col in table_data['columns']:
-            parts = [col['name']]
+        for col in table_data.columns:
+            parts = [col.name]
             
             if with_type:
-                raw_type = col['type'].upper()
+                raw_type = col.type.upper()
                 col_type = type_aliases.get(raw_type, raw_type.lower())
                 parts.append(col_type)
+
+            if col.name in primary_key:
+                parts.append('PK')
+            if col.name in foreign_keys:
+                parts.append(foreign_keys[col.name])
                 
-            if with_comment and (col_comment := col.get('comment', '')):
+            if with_comment and (col_comment := col.comment):
                 parts.append(f"# {col_comment}")
                 
             column_parts.append(":".join(parts))
         
         # 构建表行
         table_line = f"T:{table_name}({', '.join(column_parts)})"
+        if with_keys:
+            index_parts = [
+                f"{'U' if idx.unique else 'I'}:{idx.name}({','.join(idx.columns)})"
+                for idx in table_data.indexes
+            ]
+            if index_parts:
+                table_line += " " + " ".join(index_parts)
         lines.append(table_line)
     
     return "\n".join(lines)
\ No newline at end of file
@@ -1,12 +1,23 @@
 # database_schema/inspectors/__init__.py
-from .mysql import MySQLInspector
-from .sqlserver import SQLServerInspector
-from .postgresql import PostgreSQLInspector
-from .oracle import OracleInspector
+# 按需导入各数据库的检查器，只加载实际使用的方言
+from importlib import import_module
+
+INSPECTOR_MODULES = {
+    'MySQLInspector': '.mysql',
+    'SQLServerInspector': '.sqlserver',
+    'PostgreSQLInspector': '.postgresql',
+    'OracleInspector': '.oracle'
+}
 
 __all__ = [
     'MySQLInspector',
     'SQLServerInspector',
     'PostgreSQLInspector',
     'OracleInspector'
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name: str):
+    if name in INSPECTOR_MODULES:
+        return getattr(import_module(INSPECTOR_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,7 +1,7 @@
 # database_schema/base.py
 from abc import ABC, abstractmethod
 from sqlalchemy import create_engine
-from sqlalchemy.engine import reflection
+from sqlalchemy.engine import Engine, reflection
 from sqlalchemy.exc import (
     OperationalError,
     ArgumentError,
@@ -9,16 +9,23 @@ from sqlalchemy.exc import (
     TimeoutError
 )
 from urllib.parse import quote_plus
+from utils.circuit_breaker import DatabaseUnavailableError, is_connect_failure, timeout_connect_args
 
 class BaseInspector(ABC):
     """元数据获取抽象基类"""
+    # 数据库类型，用于选择驱动级超时参数
+    db_type: str = ''
     
     def __init__(self, host: str, port: int, database: str, 
-                username: str, password: str, schema_name: str = None, **kwargs):
+                username: str, password: str, schema_name: str = None,
+                connect_timeout: float | None = None,
+                read_timeout: float | None = None, **kwargs):
         try:
             self.engine = create_engine(
-                self.build_conn_str(host, port, database, username, password)
+                self.build_conn_str(host, port, database, username, password),
+                connect_args=self.build_connect_args(connect_timeout, read_timeout)
             )
+            self.configure_engine(self.engine, read_timeout)
             self.conn = self.engine.connect()
         except ArgumentError as e:
             raise ValueError(f"连接字符串格式错误: {str(e)}")
@@ -31,9 +38,14 @@ class BaseInspector(ABC):
                 
                 core/server/tcp/request_render.py
                 raise Exception("Connection is closed")
+
+                只有网络不可达、连接超时计入熔断
             '''
+            if is_connect_failure(e):
+                raise DatabaseUnavailableError(f"无法连接到数据库, 请检查IP/Port")
             raise ValueError(f"无法连接到数据库, 请检查数据库名称，用户名，密码")
         except TimeoutError as e:
+            # 连接池获取连接超时
             raise ValueError(f"请检查IP/Port")
         except Exception as e:
             raise ValueError(f"建立数据库连接时发生错误: {str(e)}")
@@ -47,6 +59,15 @@ class BaseInspector(ABC):
                      username: str, password: str) -> str:
         """构造数据库连接字符串"""
         pass
+
+    def build_connect_args(self, connect_timeout: float | None,
+                           read_timeout: float | None) -> dict:
+        """构造驱动级超时参数，与查询执行使用同一映射"""
+        return timeout_connect_args(self.db_type, connect_timeout, read_timeout)
+
+    def configure_engine(self, engine: Engine, read_timeout: float | None) -> None:
+        """连接前的引擎设置（如不能通过连接参数传入的超时），默认不处理"""
+        pass
     
     @abstractmethod
     def get_table_names(self, inspector: reflection.Inspector) -> list[str]:
@@ -65,6 +86,57 @@ class BaseInspector(ABC):
         """获取列注释"""
         pass
     
+    def get_table_keys(self, inspector: reflection.Inspector,
+                       table_names: list[str]) -> dict[str, dict]:
+        """
+        批量获取主键、外键与索引
+
+        :return: {表名: {'primary_key': [...], 'foreign_keys': [...], 'indexes': [...]}}
+        """
+        try:
+            pks = inspector.get_multi_pk_constraint(
+                schema=self.schema_name, filter_names=table_names)
+            fks = inspector.get_multi_foreign_keys(
+                schema=self.schema_name, filter_names=table_names)
+            indexes = inspector.get_multi_indexes(
+                schema=self.schema_name, filter_names=table_names)
+            pks = {table: v for (_, table), v in pks.items()}
+            fks = {table: v for (_, table), v in fks.items()}
+            indexes = {table: v for (_, table), v in indexes.items()}
+        except NotImplementedError:
+            # 方言不支持批量反射时逐表获取
+            pks, fks, indexes = {}, {}, {}
+            for table in table_names:
+                pks[table] = inspector.get_pk_constraint(table, schema=self.schema_name)
+                fks[table] = inspector.get_foreign_keys(table, schema=self.schema_name)
+                indexes[table] = inspector.get_indexes(table, schema=self.schema_name)
+
+        keys = {}
+        for table in table_names:
+            pk = pks.get(table) or {}
+            keys[table] = {
+                'primary_key': list(pk.get('constrained_columns') or []),
+                'foreign_keys': [
+                    {
+                        'columns': fk['constrained_columns'],
+                        'referred_table': fk['referred_table'],
+                        'referred_columns': fk['referred_columns']
+                    }
+                    for fk in fks.get(table) or []
+                    if fk.get('referred_table')
+                ],
+                'indexes': [
+                    {
+                        'name': idx['name'],
+                        'columns': [c for c in idx['column_names'] if c],
+                        'unique': bool(idx.get('unique'))
+                    }
+                    for idx in indexes.get(table) or []
+                    if any(idx.get('column_names') or [])
+                ]
+            }
+        return keys
+
     @abstractmethod
     def normalize_type(self, raw_type: str) -> str:
         """标准化字段类型"""
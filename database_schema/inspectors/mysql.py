@@ -5,10 +5,11 @@ from urllib.parse import quote_plus
 
 class MySQLInspector(BaseInspector):
     """MySQL元数据获取实现"""
+    db_type = 'mysql'
     
     def __init__(self, host: str, port: int, database: str, 
                 username: str, password: str, schema_name: str = None, **kwargs):
-        super().__init__(host, port, database, username, password, schema_name)
+        super().__init__(host, port, database, username, password, schema_name, **kwargs)
         # MySQL 中 schema 等同于 database
         self.schema_name = database  # 强制使用连接时指定的数据库名
     
@@ -1,24 +1,35 @@
+from sqlalchemy import event
 from sqlalchemy.sql import text
 from .base import BaseInspector
-from sqlalchemy.engine import reflection
+from sqlalchemy.engine import Engine, reflection
 from urllib.parse import quote_plus
 
 class OracleInspector(BaseInspector):
     """Oracle元数据获取实现"""
+    db_type = 'oracle'
     
     def __init__(self, host: str, port: int, database: str,
                 username: str, password: str, schema_name: str = None, **kwargs):
-        super().__init__(host, port, database, username, password, schema_name)
+        super().__init__(host, port, database, username, password, schema_name, **kwargs)
         self.schema_name = username.upper()  # Oracle模式名通常与用户名一致[3,8](@ref)
     
     def build_conn_str(self, host: str, port: int, database: str,
                       username: str, password: str) -> str:
-        # 使用cx_Oracle驱动，支持SID或Service Name[6,8](@ref)
+        # 使用 python-oracledb 驱动（thin 模式，无需 Instant Client），支持SID或Service Name[6,8](@ref)
         return (
-            f"oracle+cx_oracle://{quote_plus(username)}:{quote_plus(password)}"
+            f"oracle+oracledb://{quote_plus(username)}:{quote_plus(password)}"
             f"@{host}:{port}/?service_name={database}"
         )
-    
+
+    def configure_engine(self, engine: Engine, read_timeout: float | None) -> None:
+        # python-oracledb 的查询超时是连接属性 call_timeout（毫秒），在建立连接时设置
+        if read_timeout:
+            call_timeout = int(read_timeout * 1000)
+            event.listen(
+                engine, 'connect',
+                lambda dbapi_conn, record: setattr(dbapi_conn, 'call_timeout', call_timeout)
+            )
+
     def get_table_names(self, inspector: reflection.Inspector) -> list[str]:
         return inspector.get_table_names(schema=self.schema_name)  # 需指定schema[3](@ref)
     
@@ -6,10 +6,11 @@ from urllib.parse import quote_plus
 
 class PostgreSQLInspector(BaseInspector):
     """PostgreSQL 元数据获取实现"""
+    db_type = 'postgresql'
     
     def __init__(self, host: str, port: int, database: str, 
                 username: str, password: str, schema_name: str = None, **kwargs):
-        super().__init__(host, port, database, username, password)
+        super().__init__(host, port, database, username, password, **kwargs)
         self.schema_name = schema_name or "public"
     
     def build_conn_str(self, host: str, port: int, database: str,
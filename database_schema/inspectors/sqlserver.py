@@ -5,6 +5,7 @@ from urllib.parse import quote_plus
 
 class SQLServerInspector(BaseInspector):
     """SQL Server元数据获取实现"""
+    db_type = 'sqlserver'
 
     def __init__(self, host, port, database, username, password, schema_name = None, **kwargs):
         super().__init__(host, port, database, username, password, schema_name, **kwargs)
@@ -0,0 +1,180 @@
+# database_schema/model.py
+import hashlib
+import sys
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+# 表名、字段名、类型名全部驻留，多个租户、多份表结构之间共享同一份字符串
+
+
+def _intern(value: Any) -> str:
+    return sys.intern(str(value)) if value is not None else ''
+
+
+@dataclass(frozen=True, slots=True)
+class Column:
+    name: str
+    type: str
+    comment: str = ''
+
+
+@dataclass(frozen=True, slots=True)
+class ForeignKey:
+    columns: tuple[str, ...]
+    referred_table: str
+    referred_columns: tuple[str, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class Index:
+    name: str
+    columns: tuple[str, ...]
+    unique: bool = False
+
+
+@dataclass(frozen=True, slots=True)
+class Table:
+    name: str
+    comment: str = ''
+    columns: tuple[Column, ...] = ()
+    primary_key: tuple[str, ...] = ()
+    foreign_keys: tuple[ForeignKey, ...] = ()
+    indexes: tuple[Index, ...] = ()
+
+    @property
+    def column_names(self) -> tuple[str, ...]:
+        return tuple(col.name for col in self.columns)
+
+    def to_dict(self) -> dict:
+        return {
+            'comment': self.comment,
+            'columns': [
+                {'name': col.name, 'type': col.type, 'comment': col.comment}
+                for col in self.columns
+            ],
+            'primary_key': list(self.primary_key),
+            'foreign_keys': [
+                {
+                    'columns': list(fk.columns),
+                    'referred_table': fk.referred_table,
+                    'referred_columns': list(fk.referred_columns)
+                }
+                for fk in self.foreign_keys
+            ],
+            'indexes': [
+                {'name': idx.name, 'columns': list(idx.columns), 'unique': idx.unique}
+                for idx in self.indexes
+            ]
+        }
+
+
+@dataclass(frozen=True, slots=True)
+class Schema:
+    """
+    紧凑的只读表结构
+
+    按表名提供与 get_db_schema 旧版字典相同的只读映射接口（items / keys / [] / in），
+    to_dict() 可还原为嵌套字典，content_hash 为稳定的内容摘要，可用于缓存键与变更比对。
+    """
+    tables: tuple[Table, ...] = ()
+    _index: dict = field(default=None, init=False, repr=False, compare=False)
+    _hash: str = field(default=None, init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, '_index', {table.name: table for table in self.tables})
+
+    def __getitem__(self, name: str) -> Table:
+        return self._index[name]
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._index
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def get(self, name: str, default: Any = None) -> Table | Any:
+        return self._index.get(name, default)
+
+    def keys(self):
+        return self._index.keys()
+
+    def values(self):
+        return self._index.values()
+
+    def items(self):
+        return self._index.items()
+
+    @property
+    def content_hash(self) -> str:
+        """与表顺序无关的稳定摘要"""
+        if self._hash is None:
+            digest = hashlib.blake2b(digest_size=16)
+            for table in sorted(self.tables, key=lambda t: t.name):
+                digest.update(repr(table).encode('utf-8'))
+                digest.update(b'\x00')
+            object.__setattr__(self, '_hash', digest.hexdigest())
+        return self._hash
+
+    def diff(self, other: 'Schema') -> dict[str, list[str]]:
+        """与另一份表结构比较，返回新增、删除与变更的表名"""
+        return {
+            'added': [name for name in other if name not in self],
+            'removed': [name for name in self if name not in other],
+            'changed': [name for name in self if name in other and self[name] != other[name]]
+        }
+
+    def to_dict(self) -> dict:
+        return {table.name: table.to_dict() for table in self.tables}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Schema':
+        return cls(tuple(
+            build_table(
+                name,
+                comment=table_data.get('comment'),
+                columns=table_data.get('columns', []),
+                primary_key=table_data.get('primary_key', []),
+                foreign_keys=table_data.get('foreign_keys', []),
+                indexes=table_data.get('indexes', [])
+            )
+            for name, table_data in data.items()
+        ))
+
+
+def build_table(name: str, comment: str | None, columns: list[dict],
+                primary_key: list[str] | None = None, foreign_keys: list[dict] | None = None,
+                indexes: list[dict] | None = None) -> Table:
+    """由反射结果构造 Table，所有名称驻留"""
+    return Table(
+        name=_intern(name),
+        comment=comment or '',
+        columns=tuple(
+            Column(_intern(col['name']), _intern(col['type']), col.get('comment') or '')
+            for col in columns
+        ),
+        primary_key=tuple(_intern(c) for c in primary_key or ()),
+        foreign_keys=tuple(
+            ForeignKey(
+                tuple(_intern(c) for c in fk['columns']),
+                _intern(fk['referred_table']),
+                tuple(_intern(c) for c in fk['referred_columns'])
+            )
+            for fk in foreign_keys or ()
+        ),
+        indexes=tuple(
+            Index(_intern(idx['name']), tuple(_intern(c) for c in idx['columns']), bool(idx['unique']))
+            for idx in indexes or ()
+        )
+    )
+
+
+def as_schema(schema: 'Schema | dict') -> Schema:
+    """兼容旧版嵌套字典"""
+    if schema is None:
+        raise ValueError("缺少表结构：数据库表结构反射失败")
+    if isinstance(schema, Schema):
+        return schema
+    return Schema.from_dict(schema)
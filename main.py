@@ -1,6 +1,8 @@
 from dify_plugin import Plugin, DifyPluginEnv
+from utils.prewarm import start_prewarm
 
 plugin = Plugin(DifyPluginEnv(MAX_REQUEST_TIMEOUT=120))
 
 if __name__ == '__main__':
+    start_prewarm()
     plugin.run()
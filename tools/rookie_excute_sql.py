@@ -2,39 +2,97 @@ from dify_plugin import Tool
 from typing import Any, Optional
 from collections.abc import Generator
 from dify_plugin.entities.tool import ToolInvokeMessage
-from utils.alchemy_db_client import execute_sql
+from utils.result_cache import get_cache, store_result, is_cache_sql
+from utils.result_summary import summarize_rows
+from utils.query_stats import stats_store
+from utils.compression import COMPRESSIONS, StreamCompressor, compressed_meta
+from utils.parallel_export import EXPORT_FORMATS, DEFAULT_BATCH_ROWS, ParallelEncoder
+from utils.export_worker import serialize_value
+from utils.background import native_thread_pool, shutdown_nowait
+from utils.sql_validator import is_read_only_sql
+from concurrent.futures import wait
 import json
-from datetime import datetime, date
-from decimal import Decimal
+import math
 import csv
-from io import StringIO
+from io import BytesIO, StringIO
 import re
 
 class RookieExecuteSqlTool(Tool):
     RISK_KEYWORDS = {"DROP", "DELETE", "TRUNCATE", "ALTER", "UPDATE", "INSERT"}
     SUPPORTED_FORMATS = {"json", "csv", "html", "text"}
+    # CSV/HTML 每批编码（及压缩）的行数
+    BLOB_CHUNK_ROWS = 5000
+    # 压缩 JSON 时每次写入（及压缩）的字符数
+    JSON_BLOB_CHUNK_CHARS = 1 << 20
+    # 只影响结果读取与执行方式、不传给 explain_sql 的参数
+    FETCH_ONLY_PARAMS = {'result_shape', 'fetch_size', 'stream_results', 'prefetch_rows', 'read_only'}
+    JSON_NATIVE_TYPES = {type(None), bool, int, float, str}
 
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        # 数据库相关模块在首次调用时才导入，缩短插件启动时间
+        from utils.alchemy_db_client import execute_sql
+
         try:
             # 参数校验和预处理
             execute_params, result_format = self._validate_and_prepare_params(tool_parameters)
-            
-            # 执行 SQL
-            result = execute_sql(**execute_params)
+            compression = self._get_compression(tool_parameters)
+
+            if tool_parameters.get('sql_batch'):
+                # 多语句并发执行，返回按键组织的结果集
+                yield self.create_json_message(
+                    self._execute_batch(execute_params, tool_parameters)
+                )
+                return
+
+            cache_key = self._cache_key()
+            if is_cache_sql(execute_params['sql']):
+                # 在本地结果缓存上执行，不访问源数据库
+                plan = None
+                result = self._query_cache(cache_key, execute_params)
+            else:
+                # 执行计划检查
+                plan = self._check_plan(execute_params, tool_parameters)
+
+                workers = int(tool_parameters.get('export_workers') or 0)
+                if workers > 0 and result_format in EXPORT_FORMATS:
+                    # 大结果导出：流式读取，多进程编码
+                    if plan is not None:
+                        yield self.create_json_message({"plan": plan})
+                    yield from self._count_bytes(
+                        self._parallel_export(execute_params, result_format, workers, *compression),
+                        execute_params
+                    )
+                    return
+
+                # 执行 SQL
+                result = execute_sql(**execute_params)
+                if tool_parameters.get('cache_result'):
+                    rows = self._to_records(result) if self._is_compact(result) else result
+                    if isinstance(rows, list):
+                        store_result(cache_key, execute_params['sql'], rows)
             
             # 处理结果格式
-            yield from self._handle_result_format(
+            messages = self._handle_result_format(
                 result, 
                 result_format,
-                execute_params.get('schema')
+                execute_params.get('schema'),
+                plan,
+                self._summary_budget(tool_parameters),
+                *compression
             )
+            if is_cache_sql(execute_params['sql']):
+                yield from messages
+            else:
+                yield from self._count_bytes(messages, execute_params)
             
         except Exception as e:
             raise ValueError(f"数据库操作失败：{str(e)}")
 
     def _validate_and_prepare_params(self, params: dict) -> dict:
         """参数验证和预处理"""
-        required_params = ['sql', 'db_type', 'host', 'port', 'db_name', 'username', 'password']
+        required_params = ['db_type', 'host', 'port', 'db_name', 'username', 'password']
+        if not params.get('sql_batch'):
+            required_params.insert(0, 'sql')
         missing = [p for p in required_params if not params.get(p)]
         if missing:
             raise ValueError(f"缺少必要参数: {', '.join(missing)}")
@@ -44,8 +102,9 @@ class RookieExecuteSqlTool(Tool):
         except ValueError:
             raise ValueError("端口号必须是整数")
 
-        if self._contains_risk_commands(params['sql']):
+        if params.get('sql') and self._contains_risk_commands(params['sql']):
             raise ValueError("SQL语句包含危险操作")
+        sql_params = self._parse_sql_params(params.get('sql_params'))
         params['schema'] = params.get('schema')if params.get('schema') != None else 'dbo' if params['db_type'] == 'sqlserver' else 'public'
         # 数据库执行参数
         execute_params = {
@@ -55,74 +114,299 @@ class RookieExecuteSqlTool(Tool):
             'database': params['db_name'],
             'username': params['username'],
             'password': params['password'],
-            'sql': params['sql'],
-            'params': {},
-            'schema': params.get('schema')
+            'sql': params.get('sql'),
+            'params': sql_params,
+            'schema': params.get('schema'),
+            'connect_timeout': params.get('connect_timeout'),
+            'read_timeout': params.get('read_timeout'),
+            'routing_policy': params.get('routing_policy'),
+            'fetch_size': params.get('fetch_size'),
+            'stream_results': bool(params.get('stream_results', False)),
+            'prefetch_rows': params.get('prefetch_rows')
         }
 
         # 结果格式参数
         result_format = params.get('result_format', 'text').lower()
+        # 紧凑结构只用于 JSON 输出，其他格式按行字典处理
+        if result_format == 'json' and params.get('json_shape') == 'columns':
+            execute_params['result_shape'] = 'columns'
 
         return execute_params, result_format
 
-    def _handle_result_format(self, result: Any, fmt: str, schema: Optional[str]) -> Generator[ToolInvokeMessage, None, None]:
+    def _parse_sql_params(self, raw: Any) -> dict:
+        """解析绑定变量（JSON 对象字符串或字典）"""
+        if not raw:
+            return {}
+        if isinstance(raw, dict):
+            return raw
+        try:
+            parsed = json.loads(raw)
+        except (TypeError, json.JSONDecodeError):
+            raise ValueError("sql_params 必须是 JSON 对象，例如 {\"p_status\": \"paid\"}")
+        if not isinstance(parsed, dict):
+            raise ValueError("sql_params 必须是 JSON 对象，例如 {\"p_status\": \"paid\"}")
+        return parsed
+
+    def _parse_sql_batch(self, raw: Any) -> dict[str, str]:
+        """解析批量语句：JSON 数组（以序号为键）或 {键: SQL} 对象"""
+        if isinstance(raw, (list, dict)):
+            parsed = raw
+        else:
+            try:
+                parsed = json.loads(raw)
+            except (TypeError, json.JSONDecodeError):
+                raise ValueError("sql_batch 必须是 SQL 数组或 {\"键\": \"SQL\"} 形式的 JSON 对象")
+        if isinstance(parsed, list):
+            parsed = {str(i): sql for i, sql in enumerate(parsed)}
+        if not isinstance(parsed, dict) or not parsed:
+            raise ValueError("sql_batch 必须是 SQL 数组或 {\"键\": \"SQL\"} 形式的 JSON 对象")
+        return {str(key): str(sql) for key, sql in parsed.items()}
+
+    def _execute_batch(self, execute_params: dict, params: dict) -> dict:
+        """
+        在连接池上并发执行多条只读语句
+
+        每条语句单独计时、单独记录错误，单条失败或超时不影响其他语句；
+        总耗时取决于最慢的语句而不是所有语句之和。
+        语句在系统线程中执行：gevent 打补丁后普通线程池只是协程，psycopg2、pymssql 等 C 驱动
+        会阻塞事件循环，语句将依次执行且等待超时无法生效。
+        语句须通过只读检查，并在数据库支持时于只读事务中执行。
+        """
+        statements = self._parse_sql_batch(params['sql_batch'])
+        max_parallel = max(1, int(params.get('max_parallel') or 4))
+        timeout = params.get('statement_timeout') or execute_params.get('read_timeout')
+        workers = min(max_parallel, len(statements))
+
+        results: dict[str, dict] = {}
+        pool = native_thread_pool(workers)
+        futures = {}
+        for key, sql in statements.items():
+            if not is_read_only_sql(sql, execute_params['db_type']):
+                results[key] = {"status": "error", "error": "仅支持单条只读语句"}
+                continue
+            statement_params = {**execute_params, 'sql': sql, 'read_only': True}
+            if timeout:
+                statement_params['read_timeout'] = timeout
+            futures[key] = pool.submit(self._execute_statement, statement_params, params)
+
+        # 超时由驱动层 read_timeout 控制，这里再按批次轮数兜底等待
+        deadline = None
+        if timeout:
+            rounds = math.ceil(len(futures) / workers) if futures else 0
+            deadline = float(timeout) * rounds + float(execute_params.get('connect_timeout') or 10)
+        wait(futures.values(), timeout=deadline)
+        shutdown_nowait(pool)
+
+        for key, future in futures.items():
+            if not future.done():
+                future.cancel()
+                results[key] = {"status": "error", "error": f"语句执行超时（{timeout} 秒）"}
+                continue
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                results[key] = {"status": "error", "error": str(e)}
+
+        return {
+            "status": "success",
+            "results": {key: results[key] for key in statements}
+        }
+
+    def _execute_statement(self, execute_params: dict, params: dict) -> dict:
+        """执行批量中的单条语句"""
+        from utils.alchemy_db_client import execute_sql
+
+        plan = self._check_plan(execute_params, params)
+        result = execute_sql(**execute_params)
+        message = {"status": "success", "result": self._safe_serialize(result)}
+        if plan is not None:
+            message["plan"] = plan
+        return message
+
+    def _cache_key(self) -> Optional[str]:
+        """结果缓存的会话标识，只使用 Dify 会话 ID，不接受调用方指定，避免读取其他会话的缓存"""
+        return getattr(self.session, 'conversation_id', None)
+
+    def _query_cache(self, cache_key: Optional[str], execute_params: dict) -> list[dict]:
+        """在本地结果缓存上执行查询"""
+        cache = get_cache(cache_key)
+        if cache is None:
+            raise ValueError("本地结果缓存已失效，请重新查询源数据库")
+        return cache.query(execute_params['sql'], execute_params['params'])
+
+    def _check_plan(self, execute_params: dict, params: dict) -> Optional[dict]:
+        """执行前通过 EXPLAIN 检查预估行数、代价与全表扫描"""
+        from utils.alchemy_db_client import explain_sql
+        from utils.explain import EXPLAIN_MODES, check_plan
+
+        mode = (params.get('explain_mode') or 'off').lower()
+        if mode not in EXPLAIN_MODES:
+            raise ValueError(f"不支持的执行计划检查模式: {mode}。支持模式: {', '.join(sorted(EXPLAIN_MODES))}")
+        if mode == 'off':
+            return None
+
+        try:
+            plan = explain_sql(**{
+                k: v for k, v in execute_params.items() if k not in self.FETCH_ONLY_PARAMS
+            })
+        except Exception as e:
+            # 无 SHOWPLAN / PLAN_TABLE 权限或语句不支持 EXPLAIN 时，warn 模式只记录告警并继续执行
+            if mode == 'reject':
+                raise ValueError(f"无法获取执行计划，已拒绝执行：{str(e)}")
+            return {'warnings': [f"无法获取执行计划：{str(e)}"]}
+        violations = check_plan(
+            plan,
+            max_rows=params.get('explain_max_rows'),
+            max_cost=params.get('explain_max_cost'),
+            block_full_scan=bool(params.get('explain_block_full_scan', False))
+        )
+        if violations and mode == 'reject':
+            raise ValueError(f"执行计划超出阈值，已拒绝执行：{'；'.join(violations)}")
+        plan['warnings'] = violations
+        return plan
+
+    def _handle_result_format(self, result: Any, fmt: str, schema: Optional[str],
+                              plan: Optional[dict] = None,
+                              summary_chars: Optional[int] = None,
+                              compression: Optional[str] = None,
+                              compression_level: Optional[int] = None) -> Generator[ToolInvokeMessage, None, None]:
         """处理不同格式的结果输出"""
         if fmt not in self.SUPPORTED_FORMATS:
             raise ValueError(f"不支持的格式: {fmt}。支持格式: {', '.join(self.SUPPORTED_FORMATS)}")
 
+        # 非 JSON 格式单独输出执行计划摘要
+        if plan is not None and fmt != 'json':
+            yield self.create_json_message({"plan": plan})
+
         # 处理空结果
         if self._is_empty_result(result):
+            if plan is not None and fmt == 'json':
+                yield self.create_json_message({"plan": plan})
             yield self.create_text_message("未查询到数据")
             return
 
         try:
-            if fmt == 'json':
-                yield self._handle_json(result)
+            if fmt == 'json' and compression:
+                yield self._handle_json_blob(result, plan, compression, compression_level)
+            elif fmt == 'json':
+                yield self._handle_json(result, plan)
             elif fmt == 'csv':
-                yield from self._handle_csv(result)
+                yield from self._handle_csv(result, compression, compression_level)
             elif fmt == 'html':
-                yield from self._handle_html(result)
+                yield from self._handle_html(result, compression, compression_level)
             else:
-                yield self._handle_text(result, schema)
+                yield self._handle_text(result, schema, summary_chars)
         except Exception as e:
             raise ValueError(f"结果格式化失败: {str(e)}")
 
-    def _handle_json(self, data: Any) -> ToolInvokeMessage:
+    def _handle_json(self, data: Any, plan: Optional[dict] = None) -> ToolInvokeMessage:
         """生成JSON格式消息"""
-        return self.create_json_message({
+        message = {
             "status": "success",
-            "result": self._safe_serialize(data)
-        })
+            "result": self._serialize_compact(data) if self._is_compact(data) else self._safe_serialize(data)
+        }
+        if plan is not None:
+            message["plan"] = plan
+        return self.create_json_message(message)
+
+    def _handle_json_blob(self, data: Any, plan: Optional[dict], compression: str,
+                          compression_level: Optional[int] = None) -> ToolInvokeMessage:
+        """开启压缩时将 JSON 消息体编码为压缩文件，边编码边压缩"""
+        message = {
+            "status": "success",
+            "result": self._serialize_compact(data) if self._is_compact(data) else data
+        }
+        if plan is not None:
+            message["plan"] = plan
+        output, write, compressor = self._open_blob(compression, compression_level)
+        encoder = json.JSONEncoder(ensure_ascii=False, default=self._custom_serializer)
+        chunk, size = [], 0
+        for part in encoder.iterencode(message):
+            chunk.append(part)
+            size += len(part)
+            if size >= self.JSON_BLOB_CHUNK_CHARS:
+                write("".join(chunk).encode('utf-8'))
+                chunk, size = [], 0
+        write("".join(chunk).encode('utf-8'))
+        return self._blob_message(
+            output, compressor,
+            meta={'mime_type': 'application/json', 'filename': 'result.json'}
+        )
+
+    def _is_compact(self, data: Any) -> bool:
+        """columns + rows 紧凑结构"""
+        return isinstance(data, dict) and 'columns' in data and 'rows' in data
 
-    def _handle_text(self, data: Any, schema: Optional[str]) -> ToolInvokeMessage:
-        """生成可读文本消息"""
+    def _to_records(self, data: dict) -> list[dict]:
+        columns = data['columns']
+        return [dict(zip(columns, row)) for row in data['rows']]
+
+    def _serialize_compact(self, data: dict) -> dict:
+        """逐个转换非 JSON 原生类型的值，避免整体 dumps/loads 往返"""
+        native = self.JSON_NATIVE_TYPES
+        serializer = self._custom_serializer
+        return {
+            "columns": data['columns'],
+            "types": data['types'],
+            "rows": [
+                [v if type(v) in native else serializer(v) for v in row]
+                for row in data['rows']
+            ]
+        }
+
+    def _handle_text(self, data: Any, schema: Optional[str],
+                     summary_chars: Optional[int] = None) -> ToolInvokeMessage:
+        """生成可读文本消息，指定摘要长度时输出结果摘要"""
+        if summary_chars and isinstance(data, list):
+            return self.create_text_message(summarize_rows(
+                data,
+                max_chars=summary_chars,
+                formatter=self._custom_serializer,
+                header=f"Schema: {schema}" if schema else ''
+            ))
         readable_text = self._to_readable_text(data, schema)
         return self.create_text_message(readable_text)
 
-    def _handle_html(self, data: list[dict]) -> Generator[ToolInvokeMessage, None, None]:
+    def _summary_budget(self, params: dict) -> Optional[int]:
+        """text 格式的摘要长度上限（字符），未开启摘要时返回 None"""
+        if (params.get('text_mode') or 'full') != 'summary':
+            return None
+        return int(params.get('summary_max_chars') or 4000)
+
+    def _handle_html(self, data: list[dict], compression: Optional[str] = None,
+                     compression_level: Optional[int] = None) -> Generator[ToolInvokeMessage, None, None]:
         """生成HTML表格"""
-        html_table = self._generate_html_table(data)
-        yield self.create_blob_message(
-            html_table.encode('utf-8'),
+        output, write, compressor = self._open_blob(compression, compression_level)
+        for chunk in self._generate_html_chunks(data):
+            write(chunk.encode('utf-8'))
+        yield self._blob_message(
+            output, compressor,
             meta={'mime_type': 'text/html', 'filename': 'result.html'}
         )
 
-    def _handle_csv(self, data: list[dict]) -> Generator[ToolInvokeMessage, None, None]:
-        """生成CSV文件"""
+    def _handle_csv(self, data: list[dict], compression: Optional[str] = None,
+                    compression_level: Optional[int] = None) -> Generator[ToolInvokeMessage, None, None]:
+        """生成CSV文件，按批次编码写出，开启压缩时边写边压缩"""
+        blob, write, compressor = self._open_blob(compression, compression_level)
         output = StringIO()
         writer = csv.writer(output)
         
         # 写入表头
         if data:
             writer.writerow(data[0].keys())
+        write(output.getvalue().encode('utf-8-sig'))
         
         # 写入数据行
-        for row in data:
-            processed_row = [self._custom_serializer(val) for val in row.values()]
-            writer.writerow(processed_row)
+        for start in range(0, len(data), self.BLOB_CHUNK_ROWS):
+            output.seek(0)
+            output.truncate()
+            for row in data[start:start + self.BLOB_CHUNK_ROWS]:
+                processed_row = [self._custom_serializer(val) for val in row.values()]
+                writer.writerow(processed_row)
+            write(output.getvalue().encode('utf-8'))
 
-        yield self.create_blob_message(
-            output.getvalue().encode('utf-8-sig'),
+        yield self._blob_message(
+            blob, compressor,
             meta={
                 'mime_type': 'text/csv',
                 'filename': 'result.csv',
@@ -130,8 +414,82 @@ class RookieExecuteSqlTool(Tool):
             }
         )
 
+    def _get_compression(self, params: dict) -> tuple[Optional[str], Optional[int]]:
+        """导出文件的压缩方式与级别"""
+        method = (params.get('compression') or 'none').lower()
+        if method not in COMPRESSIONS:
+            raise ValueError(f"不支持的压缩方式: {method}。支持方式: {', '.join(sorted(COMPRESSIONS))}")
+        level = params.get('compression_level')
+        return (None if method == 'none' else method), (int(level) if level else None)
+
+    def _open_blob(self, compression: Optional[str],
+                   compression_level: Optional[int]) -> tuple[BytesIO, Any, Optional[StreamCompressor]]:
+        """返回 (输出缓冲, 写入函数, 压缩器)"""
+        output = BytesIO()
+        if not compression:
+            return output, output.write, None
+        compressor = StreamCompressor(compression, output.write, compression_level)
+        return output, compressor.write, compressor
+
+    def _blob_message(self, output: BytesIO, compressor: Optional[StreamCompressor],
+                      meta: dict) -> ToolInvokeMessage:
+        if compressor is not None:
+            compressor.close()
+            meta = compressed_meta(meta, compressor.method)
+        return self.create_blob_message(output.getvalue(), meta=meta)
+
+    def _count_bytes(self, messages: Generator[ToolInvokeMessage, None, None],
+                     execute_params: dict) -> Generator[ToolInvokeMessage, None, None]:
+        """累计输出消息序列化后的字节数，计入该语句指纹的统计"""
+        size = 0
+        for message in messages:
+            size += self._message_size(message)
+            yield message
+        stats_store.add_bytes(execute_params['db_type'], execute_params['sql'], size)
+
+    def _message_size(self, message: ToolInvokeMessage) -> int:
+        body = getattr(message, 'message', None)
+        if isinstance(getattr(body, 'blob', None), bytes):
+            return len(body.blob)
+        if isinstance(getattr(body, 'text', None), str):
+            return len(body.text.encode('utf-8'))
+        if getattr(body, 'json_object', None) is not None:
+            return len(json.dumps(body.json_object, ensure_ascii=False, default=str).encode('utf-8'))
+        return 0
+
+    def _parallel_export(self, execute_params: dict, fmt: str, workers: int,
+                         compression: Optional[str] = None,
+                         compression_level: Optional[int] = None) -> Generator[ToolInvokeMessage, None, None]:
+        """流式读取行批次，交给编码进程编码后按顺序拼接为导出文件"""
+        from utils.alchemy_db_client import stream_sql
+
+        output, write, compressor = self._open_blob(compression, compression_level)
+        encoder = ParallelEncoder(fmt, write, workers)
+        stream_params = {
+            k: v for k, v in execute_params.items()
+            if k not in ('result_shape', 'stream_results')
+        }
+        try:
+            stream_sql(**stream_params, consumer=encoder.feed, batch_size=DEFAULT_BATCH_ROWS)
+            encoder.close()
+        finally:
+            encoder.shutdown()
+
+        if encoder.rows == 0:
+            yield self.create_text_message("未查询到数据")
+            return
+        if fmt == 'csv':
+            meta = {'mime_type': 'text/csv', 'filename': 'result.csv', 'encoding': 'utf-8-sig'}
+        else:
+            meta = {'mime_type': 'text/html', 'filename': 'result.html'}
+        yield self._blob_message(output, compressor, meta)
+
     def _generate_html_table(self, data: list[dict]) -> str:
         """生成标准HTML表格"""
+        return "".join(self._generate_html_chunks(data))
+
+    def _generate_html_chunks(self, data: list[dict]) -> Generator[str, None, None]:
+        """按批次生成HTML表格片段"""
         html = ["<table class='table table-bordered table-striped'>"]
         html.append("<thead><tr>")
         
@@ -140,13 +498,16 @@ class RookieExecuteSqlTool(Tool):
         
         html.append("</tr></thead><tbody>")
         
-        for row in data:
+        for i, row in enumerate(data, 1):
             html.append("<tr>")
             html.extend(f"<td>{self._custom_serializer(val)}</td>" for val in row.values())
             html.append("</tr>")
+            if i % self.BLOB_CHUNK_ROWS == 0:
+                yield "".join(html)
+                html = []
         
         html.append("</tbody></table>")
-        return "".join(html)
+        yield "".join(html)
 
     def _to_readable_text(self, data: Any, schema: Optional[str]) -> str:
         """生成可读性文本"""
@@ -179,19 +540,15 @@ class RookieExecuteSqlTool(Tool):
             return True
         if isinstance(result, list) and not result:
             return True
+        if self._is_compact(result):
+            return not result['rows']
         if isinstance(result, dict) and result.get("rowcount", 0) == 0:
             return True
         return False
 
     def _custom_serializer(self, obj: Any) -> Any:
-        """增强的数据类型序列化"""
-        if isinstance(obj, (datetime, date)):
-            return obj.strftime("%Y-%m-%d %H:%M:%S")
-        if isinstance(obj, Decimal):
-            return float(obj)
-        if isinstance(obj, bytes):
-            return obj.decode('utf-8', errors='replace')
-        return str(obj)
+        """增强的数据类型序列化，与导出编码进程共用同一转换"""
+        return serialize_value(obj)
 
     def _safe_serialize(self, data: Any) -> Any:
         """安全的数据序列化"""
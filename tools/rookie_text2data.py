@@ -1,17 +1,56 @@
 from cmath import e
+import json
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from collections.abc import Generator
 from typing import Any
 from dify_plugin import Tool
 from dify_plugin.entities.tool import ToolInvokeMessage
 from dify_plugin.entities.model.llm import LLMModelConfig
-from dify_plugin.entities.model.message import SystemPromptMessage, UserPromptMessage
-from utils.prompt_loader import PromptLoader
-from database_schema.connector import get_db_schema
+from dify_plugin.entities.model.message import (
+    AssistantPromptMessage,
+    SystemPromptMessage,
+    UserPromptMessage
+)
+from utils.sql_validator import is_read_only_sql, validate_sql
+from utils.result_cache import CACHE_MARKER, ConversationCache, get_cache
 from database_schema.formatter import format_schema_dsl
+from database_schema.model import Schema
 
 class RookieText2dataTool(Tool):
+    NOT_READ_ONLY = "生成的SQL不是单条只读语句"
+
     def _invoke(self, tool_parameters: dict[str, Any]) -> Generator[ToolInvokeMessage]:
+        # SQLAlchemy、Jinja 与数据库驱动在首次调用时才导入，缩短插件启动时间
+        from utils.prompt_loader import PromptLoader
+        from database_schema.connector import get_db_schema
+
         model_info= tool_parameters.get('model')
+        model_config = LLMModelConfig(
+            provider=model_info.get('provider'),
+            model=model_info.get('model'),
+            mode=model_info.get('mode'),
+            completion_params=model_info.get('completion_params')
+        )
+
+        batch_queries = self._parse_batch_queries(tool_parameters.get('batch_queries'))
+        if not batch_queries and not tool_parameters.get('query'):
+            raise ValueError("缺少必要参数: query")
+
+        # 追问优先尝试由本会话的本地结果缓存回答，不访问源数据库
+        if tool_parameters.get('use_result_cache') and not batch_queries:
+            cache = get_cache(getattr(self.session, 'conversation_id', None))
+            answer = self._answer_from_cache(cache, model_config, tool_parameters) if cache else None
+            if answer is not None:
+                cache_sql, rows = answer
+                payload = {"source": "local_cache", "result": rows}
+                if tool_parameters['result_format'] == 'json':
+                    yield self.create_json_message({"excute_sql": cache_sql, **payload})
+                else:
+                    yield self.create_text_message(cache_sql)
+                    yield self.create_json_message(payload)
+                return
+
         meta_data = get_db_schema(
             db_type=tool_parameters['db_type'],
             host=tool_parameters['host'],
@@ -20,8 +59,14 @@ class RookieText2dataTool(Tool):
             username=tool_parameters['username'],
             password=tool_parameters['password'],
             table_names=tool_parameters['table_names'],
-            schema_name=tool_parameters.get('schema_name')
+            schema_name=tool_parameters.get('schema_name'),
+            connect_timeout=tool_parameters.get('connect_timeout'),
+            read_timeout=tool_parameters.get('read_timeout'),
+            routing_policy=tool_parameters.get('routing_policy')
         )
+        if meta_data is None:
+            # 反射失败时不能用空表结构继续生成，否则模型只能猜测表名且无法校验
+            raise ValueError("获取数据库表结构失败，请检查连接参数、权限与表名")
         with_comment = tool_parameters.get('with_comment', False)
         dsl_text = format_schema_dsl(meta_data, with_type=True, with_comment=with_comment)
         # 初始化模板加载器s
@@ -31,39 +76,356 @@ class RookieText2dataTool(Tool):
             'db_type': tool_parameters['db_type'].upper(),
             'meta_data': dsl_text
         }
+        parameterized = bool(tool_parameters.get('parameterized', False))
         # 加载动态提示词
         system_prompt = prompt_loader.get_prompt(
             db_type=tool_parameters['db_type'],
             context=context,
             limit=tool_parameters.get( 'limit', 100 ),
-            user_custom_prompt=tool_parameters.get('custom_prompt', '')
+            user_custom_prompt=tool_parameters.get('custom_prompt', ''),
+            parameterized=parameterized
         )
-        response = self.session.model.llm.invoke(
-            model_config=LLMModelConfig(
-                provider=model_info.get('provider'),
-                model=model_info.get('model'),
-                mode=model_info.get('mode'),
-                completion_params=model_info.get('completion_params')
-            ),
-            prompt_messages=[
-                SystemPromptMessage(content=system_prompt),
-                UserPromptMessage(
-                    content=f"数据库类型：{tool_parameters['db_type']}\n"
-                            f"用户需求：{tool_parameters['query']}"
+
+        if batch_queries:
+            # 批量模式：共享一次反射与提示词渲染，并发调用模型
+            yield self.create_json_message({
+                "results": self._generate_batch(
+                    model_config, system_prompt, batch_queries, tool_parameters, meta_data
                 )
-            ],
+            })
+            return
+
+        excute_sql, validation_errors = self._generate_validated(
+            model_config, system_prompt, tool_parameters['query'], tool_parameters, meta_data
+        )
+        if not isinstance(excute_sql, str):
+            yield self.create_text_message("生成失败，请检查输入参数是否正确")
+            return
+
+        yield from self._emit_result(
+            excute_sql,
+            tool_parameters['result_format'],
+            parameterized,
+            validation_errors
+        )
+
+    def _generate_validated(self, model_config: LLMModelConfig, system_prompt: str, query: str,
+                            tool_parameters: dict[str, Any], meta_data: Schema) -> tuple[Any, list[str]]:
+        """
+        生成 SQL，开启 validate_sql 时在本地校验并在出错后自动重新生成一次
+
+        :return: (模型输出内容, 校验错误)
+        """
+        db_type = tool_parameters['db_type']
+        parameterized = bool(tool_parameters.get('parameterized', False))
+        prompt_messages = [
+            SystemPromptMessage(content=system_prompt),
+            UserPromptMessage(
+                content=f"数据库类型：{db_type}\n"
+                        f"用户需求：{query}"
+            )
+        ]
+        excute_sql = self._generate_candidates(model_config, prompt_messages, tool_parameters, meta_data)
+        if not isinstance(excute_sql, str):
+            return excute_sql, []
+
+        validation_errors = []
+        if tool_parameters.get('validate_sql') and meta_data:
+            validation_errors = self._validate(excute_sql, meta_data, db_type, parameterized)
+            if validation_errors:
+                # 将本地校验错误反馈给模型，自动重新生成一次
+                prompt_messages += [
+                    AssistantPromptMessage(content=excute_sql),
+                    UserPromptMessage(
+                        content="生成的SQL引用了不存在的表或字段：\n"
+                                + "\n".join(f"- {err}" for err in validation_errors)
+                                + "\n请仅使用元数据中声明的表和字段修正SQL，并按原要求输出"
+                    )
+                ]
+                retry_sql = self._generate(model_config, prompt_messages)
+                if isinstance(retry_sql, str):
+                    excute_sql = retry_sql
+                    validation_errors = self._validate(excute_sql, meta_data, db_type, parameterized)
+        return excute_sql, validation_errors
+
+    def _generate_candidates(self, model_config: LLMModelConfig, prompt_messages: list,
+                             tool_parameters: dict[str, Any], meta_data: Schema) -> Any:
+        """
+        并行请求多个候选 SQL（不同温度或模型），按到达顺序在本地校验
+
+        候选须为单条只读语句，再按表结构校验；其他候选不会被执行 EXPLAIN 或选中。
+        first_valid 策略返回最先通过校验的候选，不再等待其余请求；
+        所有请求在提交时即已开始，模型调用无法中途取消，其余请求在后台完成并照常消耗 token。
+        cheapest 策略对通过校验的候选执行 EXPLAIN，返回预估代价最低的候选。
+        没有候选通过校验时返回错误最少的候选（只读语句优先），交由后续的重新生成处理。
+        """
+        configs = self._candidate_configs(model_config, tool_parameters)
+        if len(configs) == 1:
+            return self._generate(model_config, prompt_messages)
+
+        db_type = tool_parameters['db_type']
+        parameterized = bool(tool_parameters.get('parameterized', False))
+        selection = (tool_parameters.get('candidate_selection') or 'first_valid').lower()
+        if selection not in ('first_valid', 'cheapest'):
+            raise ValueError(f"不支持的候选选择策略: {selection}。支持策略: cheapest, first_valid")
+
+        pool = ThreadPoolExecutor(max_workers=len(configs))
+        futures = [pool.submit(self._generate, config, prompt_messages) for config in configs]
+        valid, fallback, last_error = [], None, None
+        try:
+            for future in as_completed(futures):
+                try:
+                    content = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if not isinstance(content, str):
+                    continue
+                errors = self._candidate_errors(content, meta_data, db_type, parameterized)
+                if errors:
+                    # 非只读语句排在所有只读候选之后
+                    rank = (errors == [self.NOT_READ_ONLY], len(errors))
+                    if fallback is None or rank < fallback[1]:
+                        fallback = (content, rank)
+                    continue
+                if selection == 'first_valid':
+                    return content
+                valid.append(content)
+        finally:
+            # 不等待仍在进行的模型调用，它们无法取消
+            pool.shutdown(wait=False)
+
+        if valid:
+            return self._cheapest_candidate(valid, tool_parameters, parameterized)
+        if fallback is not None:
+            return fallback[0]
+        if last_error is not None:
+            raise last_error
+        return None
+
+    def _candidate_errors(self, content: str, meta_data: Schema, db_type: str,
+                          parameterized: bool) -> list[str]:
+        """候选 SQL 的错误：非单条只读语句直接淘汰，否则按表结构校验"""
+        sql, _ = self._extract(content, parameterized)
+        if not sql or not is_read_only_sql(sql, db_type):
+            return [self.NOT_READ_ONLY]
+        return validate_sql(sql, meta_data, db_type) if meta_data else []
+
+    def _candidate_configs(self, model_config: LLMModelConfig,
+                           tool_parameters: dict[str, Any]) -> list[LLMModelConfig]:
+        """按候选数量生成模型配置：依次使用候选温度，设置了候选模型时与主模型交替"""
+        count = max(1, int(tool_parameters.get('candidates') or 1))
+        if count == 1:
+            return [model_config]
+
+        raw_temperatures = tool_parameters.get('candidate_temperatures') or ''
+        try:
+            temperatures = [float(t) for t in str(raw_temperatures).split(',') if t.strip()]
+        except ValueError:
+            raise ValueError("candidate_temperatures 必须是逗号分隔的数字，例如 0,0.4,0.8")
+        if not temperatures:
+            temperatures = [None, 0.2, 0.5, 0.8, 1.0]
+
+        models = [model_config]
+        alternate = tool_parameters.get('candidate_model')
+        if alternate:
+            models.append(LLMModelConfig(
+                provider=alternate.get('provider'),
+                model=alternate.get('model'),
+                mode=alternate.get('mode'),
+                completion_params=alternate.get('completion_params')
+            ))
+
+        configs = []
+        for i in range(count):
+            base = models[i % len(models)]
+            temperature = temperatures[i % len(temperatures)]
+            params = dict(base.completion_params or {})
+            if temperature is not None:
+                params['temperature'] = temperature
+            configs.append(LLMModelConfig(
+                provider=base.provider,
+                model=base.model,
+                mode=base.mode,
+                completion_params=params
+            ))
+        return configs
+
+    def _cheapest_candidate(self, candidates: list[str], tool_parameters: dict[str, Any],
+                            parameterized: bool) -> str:
+        """对候选 SQL 执行 EXPLAIN，返回预估代价最低的候选，无法获取代价时返回最先到达的候选"""
+        from utils.alchemy_db_client import explain_sql
+
+        best, best_cost = candidates[0], None
+        for content in dict.fromkeys(candidates):
+            sql, params = self._extract(content, parameterized)
+            # EXPLAIN 在生产库上执行，模型输出须先通过只读检查
+            if not sql or not is_read_only_sql(sql, tool_parameters['db_type']):
+                continue
+            try:
+                plan = explain_sql(
+                    db_type=tool_parameters['db_type'],
+                    host=tool_parameters['host'],
+                    port=tool_parameters['port'],
+                    database=tool_parameters['db_name'],
+                    username=tool_parameters['username'],
+                    password=tool_parameters['password'],
+                    sql=sql,
+                    params=params,
+                    schema=tool_parameters.get('schema_name'),
+                    connect_timeout=tool_parameters.get('connect_timeout'),
+                    read_timeout=tool_parameters.get('read_timeout'),
+                    routing_policy=tool_parameters.get('routing_policy')
+                )
+            except Exception as e:
+                print(f"Explain candidate failed: {str(e)}")
+                continue
+            cost = plan.get('estimated_cost')
+            if cost is not None and (best_cost is None or cost < best_cost):
+                best, best_cost = content, cost
+        return best
+
+    def _generate_batch(self, model_config: LLMModelConfig, system_prompt: str, queries: list[str],
+                        tool_parameters: dict[str, Any], meta_data: Schema) -> list[dict]:
+        """按并发上限同时为多个问题生成 SQL，单个问题失败不影响其他问题"""
+        parameterized = bool(tool_parameters.get('parameterized', False))
+        max_parallel = max(1, int(tool_parameters.get('max_parallel') or 4))
+        with ThreadPoolExecutor(max_workers=min(max_parallel, len(queries))) as pool:
+            futures = [
+                pool.submit(self._generate_validated, model_config, system_prompt,
+                            query, tool_parameters, meta_data)
+                for query in queries
+            ]
+
+        results = []
+        for query, future in zip(queries, futures):
+            try:
+                excute_sql, validation_errors = future.result()
+            except Exception as e:
+                results.append({"query": query, "error": str(e)})
+                continue
+            if not isinstance(excute_sql, str):
+                results.append({"query": query, "error": "生成失败，请检查输入参数是否正确"})
+                continue
+            results.append({
+                "query": query,
+                **self._build_payload(excute_sql, parameterized, validation_errors)
+            })
+        return results
+
+    def _parse_batch_queries(self, raw: Any) -> list[str]:
+        """解析批量问题：JSON 字符串数组或按行分隔的文本"""
+        if not raw:
+            return []
+        if isinstance(raw, list):
+            queries = raw
+        else:
+            try:
+                queries = json.loads(raw)
+            except json.JSONDecodeError:
+                queries = raw.splitlines()
+            if not isinstance(queries, list):
+                raise ValueError("batch_queries 必须是问题数组或按行分隔的问题")
+        return [str(q).strip() for q in queries if str(q).strip()]
+
+    def _answer_from_cache(self, cache: ConversationCache, model_config: LLMModelConfig,
+                           tool_parameters: dict[str, Any]) -> tuple[str, list[dict]] | None:
+        """
+        让模型判断追问能否仅由缓存表回答，能则在本地执行
+
+        :return: (带缓存标记的 SQL, 结果行)，无法由缓存回答时返回 None
+        """
+        from utils.prompt_loader import PromptLoader
+
+        cache_schema = cache.schema()
+        system_prompt = PromptLoader().get_prompt(
+            db_type='sqlite',
+            context={
+                'db_type': 'SQLITE',
+                'meta_data': format_schema_dsl(cache_schema, with_type=True, with_comment=True)
+            },
+            limit=tool_parameters.get('limit', 100),
+            user_custom_prompt="\n".join(filter(None, [
+                tool_parameters.get('custom_prompt', ''),
+                "以上元数据是本会话之前查询结果的本地缓存表，注释为产生该表的原始查询。"
+                "仅当需求可以完全由这些缓存表回答时生成SQLite语法的SQL，"
+                "否则返回“无法生成符合要求的SQL语句”"
+            ]))
+        )
+        content = self._generate(model_config, [
+            SystemPromptMessage(content=system_prompt),
+            UserPromptMessage(content=f"用户需求：{tool_parameters['query']}")
+        ])
+        if not isinstance(content, str) or "无法生成" in content:
+            return None
+
+        sql = self._extract_sql_from_text(content)
+        if not sql or validate_sql(sql, cache_schema, 'sqlite'):
+            return None
+        try:
+            rows = cache.query(sql)
+        except sqlite3.Error as e:
+            print(f"Local cache query failed: {str(e)}")
+            return None
+        return f"{CACHE_MARKER} {sql}", rows
+
+    def _generate(self, model_config: LLMModelConfig, prompt_messages: list) -> Any:
+        """调用模型生成 SQL，返回模型输出内容"""
+        response = self.session.model.llm.invoke(
+            model_config=model_config,
+            prompt_messages=prompt_messages,
             stream=False
         )
-        excute_sql = response.message.content
-        if (isinstance(excute_sql, str)):
-            if (tool_parameters['result_format'] == 'json'):
-                yield self.create_json_message({
-                    "excute_sql": excute_sql
-                })
-            else:
-                yield self.create_text_message(excute_sql)
+        return response.message.content
+
+    def _validate(self, content: str, meta_data: Schema, db_type: str,
+                  parameterized: bool) -> list[str]:
+        """基于反射的表结构在本地校验生成的 SQL"""
+        sql, _ = self._extract(content, parameterized)
+        if not sql:
+            return []
+        return validate_sql(sql, meta_data, db_type)
+
+    def _extract(self, content: str, parameterized: bool) -> tuple[str, dict]:
+        """从模型输出中提取 SQL 与绑定变量"""
+        if parameterized:
+            return self._extract_sql_and_params(content)
+        return self._extract_sql_from_text(content), {}
+
+    def _build_payload(self, excute_sql: str, parameterized: bool,
+                       validation_errors: list[str]) -> dict:
+        """组装生成结果：SQL、绑定变量与校验错误"""
+        payload = {"excute_sql": excute_sql}
+        if parameterized:
+            payload['excute_sql'], payload['params'] = self._extract_sql_and_params(excute_sql)
+        if validation_errors:
+            payload['validation_errors'] = validation_errors
+        return payload
+
+    def _emit_result(self, excute_sql: str, result_format: str, parameterized: bool,
+                     validation_errors: list[str]) -> Generator[ToolInvokeMessage, None, None]:
+        """按返回格式输出生成结果"""
+        payload = self._build_payload(excute_sql, parameterized, validation_errors)
+
+        if result_format == 'json':
+            yield self.create_json_message(payload)
         else:
-            yield self.create_text_message("生成失败，请检查输入参数是否正确")
+            yield self.create_text_message(payload.pop('excute_sql'))
+            if payload:
+                yield self.create_json_message(payload)
+
+    def _extract_sql_and_params(self, text: str) -> tuple[str, dict]:
+        """解析参数化输出 {"sql": ..., "params": {...}}，解析失败时按普通 SQL 处理"""
+        start, end = text.find('{'), text.rfind('}')
+        if start != -1 and end > start:
+            try:
+                payload = json.loads(text[start:end + 1])
+            except json.JSONDecodeError:
+                payload = None
+            if isinstance(payload, dict) and isinstance(payload.get('sql'), str):
+                params = payload.get('params')
+                return payload['sql'].strip(), params if isinstance(params, dict) else {}
+        return self._extract_sql_from_text(text) or text.strip(), {}
 
     def _extract_sql_from_text(self, text: str) -> str:
         import re
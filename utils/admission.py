@@ -0,0 +1,171 @@
+# utils/admission.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 每个目标库（host/port/database）允许的并发查询数
+MAX_CONCURRENCY = _env_int('ROOKIE_MAX_CONCURRENCY_PER_TARGET', 4)
+# 每个目标库允许排队等待的请求数，超出后立即拒绝
+MAX_QUEUE = _env_int('ROOKIE_MAX_QUEUE_PER_TARGET', 16)
+# 排队最长等待时间（秒），需小于 Dify 的 MAX_REQUEST_TIMEOUT
+QUEUE_TIMEOUT = _env_float('ROOKIE_QUEUE_TIMEOUT', 30.0)
+# 排队指标的日志间隔（秒），为 0 时不输出
+STATS_LOG_INTERVAL = _env_float('ROOKIE_ADMISSION_LOG_INTERVAL', 60.0)
+
+
+class AdmissionRejected(ValueError):
+    """目标数据库繁忙，请求被准入控制拒绝"""
+
+
+def target_key(db_type: str, host: str, port: int, database: str) -> tuple:
+    """构造目标库标识"""
+    return (db_type.lower().strip(), host.strip().lower(), int(port), database)
+
+
+class TargetLimiter:
+    """单个目标库的并发信号量 + 有界等待队列"""
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._cond = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        # 统计指标
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self) -> float:
+        """获取执行槽位，返回排队耗时（秒）"""
+        start = time.monotonic()
+        with self._cond:
+            if self._running < self.max_concurrency and self._waiting == 0:
+                self._running += 1
+                self.admitted += 1
+                return 0.0
+
+            if self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise AdmissionRejected(
+                    f"目标数据库并发已满（运行 {self._running}，排队 {self._waiting}），请稍后重试"
+                )
+
+            self._waiting += 1
+            try:
+                deadline = start + self.queue_timeout
+                while self._running >= self.max_concurrency:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timed_out += 1
+                        raise AdmissionRejected(
+                            f"等待数据库执行槽位超时（{self.queue_timeout:.0f} 秒），请稍后重试"
+                        )
+                    self._cond.wait(remaining)
+            finally:
+                self._waiting -= 1
+
+            self._running += 1
+            waited = time.monotonic() - start
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            return waited
+
+    def release(self) -> None:
+        with self._cond:
+            self._running -= 1
+            self._cond.notify()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'running': self._running,
+                'waiting': self._waiting,
+                'admitted': self.admitted,
+                'rejected': self.rejected,
+                'timed_out': self.timed_out,
+                'avg_wait': self.total_wait / self.admitted if self.admitted else 0.0,
+                'max_wait': self.max_wait
+            }
+
+
+_limiters: dict[tuple, TargetLimiter] = {}
+_limiters_lock = threading.Lock()
+_last_stats_log = time.monotonic()
+
+
+def get_limiter(key: tuple) -> TargetLimiter:
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = TargetLimiter(MAX_CONCURRENCY, MAX_QUEUE, QUEUE_TIMEOUT)
+            _limiters[key] = limiter
+        return limiter
+
+
+@contextmanager
+def admit(db_type: str, host: str, port: int, database: str):
+    """
+    准入控制：同一目标库的并发数超过上限时排队，队列已满时快速拒绝
+    """
+    limiter = get_limiter(target_key(db_type, host, port, database))
+    try:
+        waited = limiter.acquire()
+    except AdmissionRejected:
+        print(f"Admission rejected for {db_type}://{host}:{port}/{database}: {limiter.stats()}")
+        raise
+    if waited > 0:
+        print(f"Queued {waited:.3f}s for {db_type}://{host}:{port}/{database}")
+    _maybe_log_stats()
+    try:
+        yield limiter
+    finally:
+        limiter.release()
+
+
+def admission_stats() -> dict[str, dict]:
+    """所有目标库的排队指标"""
+    with _limiters_lock:
+        items = list(_limiters.items())
+    return {
+        f"{key[0]}://{key[1]}:{key[2]}/{key[3]}": limiter.stats()
+        for key, limiter in items
+    }
+
+
+def _maybe_log_stats() -> None:
+    """按 ROOKIE_ADMISSION_LOG_INTERVAL 周期输出各目标库的排队深度与等待时长"""
+    global _last_stats_log
+    if STATS_LOG_INTERVAL <= 0:
+        return
+    now = time.monotonic()
+    with _limiters_lock:
+        if now - _last_stats_log < STATS_LOG_INTERVAL:
+            return
+        _last_stats_log = now
+    for target, stats in admission_stats().items():
+        print(
+            f"Admission {target}: running={stats['running']} waiting={stats['waiting']} "
+            f"admitted={stats['admitted']} rejected={stats['rejected']} timed_out={stats['timed_out']} "
+            f"avg_wait={stats['avg_wait']:.3f}s max_wait={stats['max_wait']:.3f}s"
+        )
@@ -1,8 +1,38 @@
-from typing import Any
-from sqlalchemy import create_engine, inspect, text
-from sqlalchemy.exc import SQLAlchemyError
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from functools import lru_cache
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.sql.elements import TextClause
 from urllib.parse import quote_plus # 用于对URL进行编码
 from typing import Any, Optional, Union
+from utils.admission import MAX_CONCURRENCY
+from utils.explain import explain_plan
+from utils.circuit_breaker import DatabaseUnavailableError, is_connect_failure, timeout_connect_args
+from utils.replica_router import route_call
+from utils.query_stats import stats_store
+
+# 进程内缓存的连接池数量，超出后按最近最少使用淘汰
+ENGINE_CACHE_SIZE = int(os.getenv('ROOKIE_ENGINE_CACHE_SIZE', 32))
+_engines: OrderedDict[tuple, Engine] = OrderedDict()
+_engines_lock = threading.Lock()
+
+RESULT_SHAPES = {'records', 'columns'}
+# 只读事务：语句中的写操作由数据库拒绝；SQL Server 没有只读事务，只依赖调用方的语句检查
+_READ_ONLY_TRANSACTION = {
+    'mysql': "START TRANSACTION READ ONLY",
+    'postgresql': "SET TRANSACTION READ ONLY",
+    'oracle': "SET TRANSACTION READ ONLY"
+}
+_VALUE_TYPES = {
+    'int': 'integer', 'float': 'number', 'Decimal': 'decimal', 'str': 'string',
+    'bool': 'boolean', 'datetime': 'datetime', 'date': 'date', 'time': 'time',
+    'timedelta': 'interval', 'bytes': 'bytes', 'UUID': 'string'
+}
 
 #def get_db_schema(
 #        db_type: str,
@@ -153,57 +183,292 @@ def execute_sql(
     password: str,
     sql: str,
     params: Optional[dict[str, Any]] = None,
-    schema: Optional[str] = None
+    schema: Optional[str] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    routing_policy: Optional[str] = None,
+    result_shape: str = 'records',
+    fetch_size: Optional[int] = None,
+    stream_results: bool = False,
+    prefetch_rows: Optional[int] = None,
+    read_only: bool = False
 ) -> Union[list[dict[str, Any]], dict[str, Any], None]:
     """
     增强版 SQL 执行函数，支持 PostgreSQL schema
     
     参数新增:
         schema: 指定目标schema（主要用于PostgreSQL）
+        connect_timeout: 连接超时（秒），默认 ROOKIE_CONNECT_TIMEOUT
+        read_timeout: 查询超时（秒），为空时使用驱动默认值
+        routing_policy: host 为多个只读节点时的路由策略
+            (round_robin / least_outstanding / latency_weighted)
+        result_shape: records 返回字典列表；columns 返回
+            {"columns": [...], "types": [...], "rows": [[...], ...]}，直接由游标元组构造
+        fetch_size: 每次从数据库取回的行数（Oracle arraysize / 流式读取的批大小）
+        stream_results: 使用服务端游标流式读取（pymysql SSCursor、psycopg2 命名游标），
+            不支持服务端游标的驱动（pymssql）按 fetch_size 分批读取
+        prefetch_rows: Oracle 执行语句时随响应预取的行数
+        read_only: 在只读事务中执行（MySQL / PostgreSQL / Oracle）
     """
+    if result_shape not in RESULT_SHAPES:
+        raise ValueError(f"不支持的结果结构: {result_shape}。支持结构: {', '.join(sorted(RESULT_SHAPES))}")
 
     # 参数预处理
     params = params or {}
+    options = _get_fetch_options(db_type, fetch_size, stream_results, prefetch_rows, read_timeout)
+
+    def work(conn: Connection):
+        if read_only and db_type.lower() in _READ_ONLY_TRANSACTION:
+            conn.exec_driver_sql(_READ_ONLY_TRANSACTION[db_type.lower()])
+        if options:
+            conn = conn.execution_options(**options)
+        start = time.perf_counter()
+        try:
+            result = _process_result(conn.execute(_compile_text(sql), params), result_shape)
+        except SQLAlchemyError:
+            _record_statement(db_type, sql, start, error=True)
+            raise
+        _record_statement(db_type, sql, start, rows=_row_count(result))
+        return result
+
+    return _run_on_target(
+        db_type, host, port, database, username, password,
+        schema, connect_timeout, read_timeout, routing_policy, work
+    )
+
+def stream_sql(
+    db_type: str,
+    host: str,
+    port: int,
+    database: str,
+    username: str,
+    password: str,
+    sql: str,
+    consumer: Callable[[list[str], list[tuple]], Any],
+    params: Optional[dict[str, Any]] = None,
+    schema: Optional[str] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    routing_policy: Optional[str] = None,
+    batch_size: int = 10000,
+    fetch_size: Optional[int] = None,
+    prefetch_rows: Optional[int] = None
+) -> int:
+    """
+    以服务端游标流式执行查询，每读取 batch_size 行调用一次 consumer(字段名, 行元组列表)
+
+    consumer 在持有连接与执行槽位的线程中同步调用
+    :return: 总行数
+    """
+    params = params or {}
+    options = _get_fetch_options(db_type, fetch_size or batch_size, True, prefetch_rows, read_timeout)
+
+    def work(conn: Connection) -> int:
+        start = time.perf_counter()
+        # consumer 的处理耗时不计入语句耗时
+        consumed, total = 0.0, 0
+        try:
+            result = conn.execution_options(**options).execute(_compile_text(sql), params)
+            if not result.returns_rows:
+                raise ValueError("流式导出仅支持返回结果集的语句")
+            columns = list(result.keys())
+            for batch in result.partitions(batch_size):
+                rows = [tuple(row) for row in batch]
+                consumer_start = time.perf_counter()
+                consumer(columns, rows)
+                consumed += time.perf_counter() - consumer_start
+                total += len(rows)
+        except SQLAlchemyError:
+            _record_statement(db_type, sql, start, consumed, error=True)
+            raise
+        _record_statement(db_type, sql, start, consumed, rows=total)
+        return total
+
+    return _run_on_target(
+        db_type, host, port, database, username, password,
+        schema, connect_timeout, read_timeout, routing_policy, work
+    )
+
+def _record_statement(db_type: str, sql: str, start: float, excluded: float = 0.0,
+                      rows: int = 0, error: bool = False) -> None:
+    """
+    按语句指纹记录执行耗时、行数与失败次数
+
+    只统计在已获得连接上的执行与读取，排队、建连与准入 / 熔断拒绝不计入
+    """
+    stats_store.record(db_type, sql, time.perf_counter() - start - excluded, rows=rows, error=error)
+
+def _row_count(result: Any) -> int:
+    if isinstance(result, list):
+        return len(result)
+    if isinstance(result, dict):
+        return len(result['rows']) if 'rows' in result else int(result.get('rowcount') or 0)
+    return 0
+
+def explain_sql(
+    db_type: str,
+    host: str,
+    port: int,
+    database: str,
+    username: str,
+    password: str,
+    sql: str,
+    params: Optional[dict[str, Any]] = None,
+    schema: Optional[str] = None,
+    connect_timeout: Optional[float] = None,
+    read_timeout: Optional[float] = None,
+    routing_policy: Optional[str] = None
+) -> dict[str, Any]:
+    """
+    获取 SQL 的执行计划摘要（预估行数、代价、全表扫描的表），不执行语句本身
+    """
+    params = params or {}
+    return _run_on_target(
+        db_type, host, port, database, username, password,
+        schema, connect_timeout, read_timeout, routing_policy,
+        lambda conn: explain_plan(conn, db_type, sql, params)
+    )
+
+def _run_on_target(
+    db_type: str,
+    host: str,
+    port: int,
+    database: str,
+    username: str,
+    password: str,
+    schema: Optional[str],
+    connect_timeout: Optional[float],
+    read_timeout: Optional[float],
+    routing_policy: Optional[str],
+    work: Callable[[Connection], Any]
+) -> Any:
+    """选择节点并在其连接上执行 work(conn)"""
     driver = _get_driver(db_type)
     encoded_username = quote_plus(username)
     encoded_password = quote_plus(password)
-    connect_args = {}
+    connect_args = timeout_connect_args(db_type, connect_timeout, read_timeout)
     # PostgreSQL 特殊处理
     if db_type.lower() == 'postgresql' and schema:
-        connect_args['options'] = f"-c search_path={schema}"
+        connect_args['options'] = " ".join(
+            filter(None, [f"-c search_path={schema}", connect_args.get('options')])
+        )
 
     #if db_type.lower() == 'sqlserver':
     #    import os
     #    driver_extra_info = 'ODBC+Driver+17+for+SQL+Server' if os.name == 'posix' else 'SQL Server'
     #    print(driver_extra_info)
-    # 构建连接字符串
-    connection_uri = _build_connection_uri(
-        db_type, driver, encoded_username, encoded_password,
-        host, port, database
-    )
+    def run(node: str, node_port: int):
+        # 构建连接字符串
+        connection_uri = _build_connection_uri(
+            db_type, driver, encoded_username, encoded_password,
+            node, node_port, database
+        )
+        return _with_connection(connection_uri, connect_args, db_type, schema, work)
 
     try:
-        engine = create_engine(connection_uri, connect_args=connect_args)
-        with engine.begin() as conn:
-            # 显式设置schema（部分数据库需要）
-            if db_type.lower() == 'postgresql' and schema:
-                conn.execute(text(f"SET search_path TO {schema}"))
-                
-            result_proxy = conn.execute(text(sql), params)
-            
-            return _process_result(result_proxy)
-            
+        return route_call(db_type, host, port, database, run, policy=routing_policy)
     except SQLAlchemyError as e:
         raise ValueError(f"数据库操作失败：{str(e)}")
-    finally:
-        if 'engine' in locals():
-            engine.dispose()
+
+def _with_connection(
+    connection_uri: str,
+    connect_args: dict,
+    db_type: str,
+    schema: Optional[str],
+    work: Callable[[Connection], Any]
+) -> Any:
+    """在已获得执行槽位的前提下获取连接并执行"""
+    engine = _get_engine(connection_uri, connect_args)
+    # 仅连接阶段的网络不可达、连接超时计入熔断；认证失败、连接池耗尽与 SQL 错误不影响目标库状态
+    try:
+        conn = engine.connect()
+    except PoolTimeoutError as e:
+        raise ValueError(f"获取数据库连接超时，连接池已满：{str(e)}")
+    except SQLAlchemyError as e:
+        if is_connect_failure(e):
+            raise DatabaseUnavailableError(f"无法连接到数据库：{str(e)}")
+        raise ValueError(f"无法连接到数据库：{str(e)}")
+
+    with conn, conn.begin():
+        # 显式设置schema（部分数据库需要）
+        if db_type.lower() == 'postgresql' and schema:
+            conn.execute(text(f"SET search_path TO {schema}"))
+
+        return work(conn)
+
+def _get_engine(connection_uri: str, connect_args: dict) -> Engine:
+    """
+    获取缓存的连接池
+
+    复用连接后，SQLAlchemy 的编译缓存与驱动的语句缓存（如 python-oracledb stmtcachesize）
+    可以跨请求命中，配合绑定变量实现数据库执行计划复用
+    """
+    key = (connection_uri, tuple(sorted(connect_args.items())))
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is not None:
+            _engines.move_to_end(key)
+            return engine
+
+        engine = create_engine(
+            connection_uri,
+            connect_args=connect_args,
+            pool_size=MAX_CONCURRENCY,
+            max_overflow=0,
+            pool_pre_ping=True,
+            pool_recycle=1800
+        )
+        if connection_uri.startswith('oracle'):
+            event.listen(engine, 'before_cursor_execute', _apply_oracle_cursor_options)
+        _engines[key] = engine
+        while len(_engines) > ENGINE_CACHE_SIZE:
+            _, evicted = _engines.popitem(last=False)
+            evicted.dispose()
+        return engine
+
+@lru_cache(maxsize=256)
+def _compile_text(sql: str) -> TextClause:
+    """缓存 text() 构造，相同语句只解析一次绑定参数"""
+    return text(sql)
+
+def _get_fetch_options(
+    db_type: str,
+    fetch_size: Optional[int],
+    stream_results: bool,
+    prefetch_rows: Optional[int],
+    read_timeout: Optional[float]
+) -> dict[str, Any]:
+    """按方言生成读取相关的执行选项"""
+    options: dict[str, Any] = {}
+    if stream_results:
+        # yield_per 同时开启服务端游标，并按批次 fetchmany
+        options['yield_per'] = int(fetch_size or 1000)
+    if db_type.lower() == 'oracle':
+        if fetch_size:
+            options['oracle_arraysize'] = int(fetch_size)
+        if prefetch_rows is not None:
+            options['oracle_prefetchrows'] = int(prefetch_rows)
+        if read_timeout:
+            options['oracle_call_timeout'] = int(read_timeout * 1000)
+    return options
+
+def _apply_oracle_cursor_options(conn, cursor, statement, parameters, context, executemany):
+    """python-oracledb 的 arraysize / prefetchrows 需在 execute 之前设置到游标上"""
+    if context is None:
+        return
+    options = context.execution_options
+    if 'oracle_arraysize' in options:
+        cursor.arraysize = options['oracle_arraysize']
+    if 'oracle_prefetchrows' in options:
+        cursor.prefetchrows = options['oracle_prefetchrows']
+    # 连接会被连接池复用，未设置时恢复为不限时
+    cursor.connection.call_timeout = options.get('oracle_call_timeout', 0)
 
 def _get_driver(db_type: str) -> str:
     """获取数据库驱动"""
     drivers = {
         'mysql': 'pymysql',
-        'oracle': 'cx_oracle',
+        'oracle': 'oracledb',
         'sqlserver': 'pymssql',
         'postgresql': 'psycopg2'
     }
@@ -224,8 +489,25 @@ def _build_connection_uri(
     return f"{db_type}+{driver}://{username}:{password}@{host}:{port}/{database}"
 
 
-def _process_result(result_proxy) -> Union[list[dict], dict, None]:
+def _process_result(result_proxy, result_shape: str = 'records') -> Union[list[dict], dict, None]:
     """处理执行结果"""
-    if result_proxy.returns_rows:
-        return [dict(row._mapping) for row in result_proxy]
-    return {"rowcount": result_proxy.rowcount}
+    if not result_proxy.returns_rows:
+        return {"rowcount": result_proxy.rowcount}
+    if result_shape == 'columns':
+        columns = list(result_proxy.keys())
+        rows = [tuple(row) for row in result_proxy]
+        return {
+            "columns": columns,
+            "types": [
+                _value_type(next((row[i] for row in rows if row[i] is not None), None))
+                for i in range(len(columns))
+            ],
+            "rows": rows
+        }
+    return [dict(row._mapping) for row in result_proxy]
+
+def _value_type(value: Any) -> str:
+    """根据首个非空值推断字段类型名"""
+    if value is None:
+        return 'null'
+    return _VALUE_TYPES.get(type(value).__name__, type(value).__name__)
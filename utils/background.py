@@ -0,0 +1,52 @@
+# utils/background.py
+import sys
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any
+
+
+def _gevent_patched() -> bool:
+    if 'gevent' not in sys.modules:
+        return False
+    from gevent import monkey
+    return monkey.is_module_patched('threading')
+
+
+def run_in_background(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    在系统线程中执行 func，不阻塞请求处理
+
+    dify_plugin 导入时会执行 gevent.monkey.patch_all，此后 threading.Thread 只是协程，
+    导入模块、写文件等阻塞工作会卡住事件循环，因此改用 gevent hub 的线程池
+    """
+    if _gevent_patched():
+        from gevent import get_hub
+        return get_hub().threadpool.spawn(func, *args)
+    thread = threading.Thread(target=func, args=args, daemon=True)
+    thread.start()
+    return thread
+
+
+def native_thread_pool(max_workers: int) -> Executor:
+    """
+    concurrent.futures 兼容的线程池，任务始终在系统线程中执行
+
+    gevent 打补丁后使用 gevent.threadpool.ThreadPoolExecutor，其 Future 的等待会让出事件循环
+    """
+    if _gevent_patched():
+        from gevent.threadpool import ThreadPoolExecutor as GeventThreadPoolExecutor
+        return GeventThreadPoolExecutor(max_workers=max_workers)
+    return ThreadPoolExecutor(max_workers=max_workers)
+
+
+def shutdown_nowait(pool: Executor) -> None:
+    """
+    关闭线程池并取消排队中的任务，不等待正在执行的任务
+
+    gevent 的 ThreadPoolExecutor.shutdown 即使 wait=False 也会等到工作线程全部退出，
+    因此放在单独的线程（打补丁后为协程）中关闭
+    """
+    threading.Thread(
+        target=pool.shutdown, kwargs={'wait': False, 'cancel_futures': True}, daemon=True
+    ).start()
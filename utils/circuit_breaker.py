@@ -0,0 +1,162 @@
+# utils/circuit_breaker.py
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# 首次连接失败后的熔断时长（秒），连续失败时翻倍
+BASE_BACKOFF = _env_float('ROOKIE_BREAKER_BACKOFF', 10.0)
+# 熔断时长上限（秒）
+MAX_BACKOFF = _env_float('ROOKIE_BREAKER_MAX_BACKOFF', 120.0)
+# 默认连接超时（秒），避免不可达的主机占满 Dify 的请求超时
+DEFAULT_CONNECT_TIMEOUT = _env_float('ROOKIE_CONNECT_TIMEOUT', 10.0)
+
+
+def timeout_connect_args(db_type: str, connect_timeout: float | None,
+                         read_timeout: float | None) -> dict:
+    """
+    各驱动的连接 / 查询超时参数，查询执行与表结构反射共用
+
+    Oracle（python-oracledb）的查询超时是连接属性 call_timeout，不在连接参数中，由调用方设置
+    """
+    db_type = db_type.lower()
+    connect_timeout = max(1, int(connect_timeout or DEFAULT_CONNECT_TIMEOUT))
+    if db_type == 'mysql':
+        args = {'connect_timeout': connect_timeout}
+        if read_timeout:
+            args['read_timeout'] = int(read_timeout)
+        return args
+    if db_type == 'postgresql':
+        args = {'connect_timeout': connect_timeout}
+        if read_timeout:
+            args['options'] = f"-c statement_timeout={int(read_timeout * 1000)}"
+        return args
+    if db_type == 'sqlserver':
+        args = {'login_timeout': connect_timeout}
+        if read_timeout:
+            args['timeout'] = int(read_timeout)
+        return args
+    if db_type == 'oracle':
+        return {'tcp_connect_timeout': float(connect_timeout)}
+    return {}
+
+
+class DatabaseUnavailableError(ValueError):
+    """数据库不可达（连接失败或处于熔断期）"""
+
+
+# 认证失败、库不存在等由调用方参数引起的错误，不代表目标库不可达
+_AUTH_ERROR_RE = re.compile(
+    r"access denied|authentication failed|login failed|invalid username|ORA-01017|ORA-01005"
+    r"|unknown database|database \"[^\"]*\" does not exist|no pg_hba\.conf entry", re.I
+)
+# 网络不可达或连接超时
+_NETWORK_ERROR_RE = re.compile(
+    r"can't connect|could not connect|connection refused|connection reset|timed out|timeout expired"
+    r"|no route to host|network is unreachable|could not translate host name|name or service not known"
+    r"|adaptive server is unavailable|lost connection|server has gone away"
+    r"|DPY-6005|DPY-4011|ORA-12170|ORA-12541|ORA-12543", re.I
+)
+# pymysql（2003/2005/2006/2013）与 pymssql（20009）的网络类错误码
+_NETWORK_ERROR_CODES = {2003, 2005, 2006, 2013, 20009}
+
+
+def is_connect_failure(error: BaseException) -> bool:
+    """
+    判断建立连接时的异常是否为网络不可达或连接超时
+
+    只有这类错误才计入熔断；认证失败、库名错误等按普通错误返回给调用方。
+    连接池获取连接超时（SQLAlchemy TimeoutError）由调用方单独处理。
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        if isinstance(error, OSError):
+            return True
+        message = str(error)
+        if _AUTH_ERROR_RE.search(message):
+            return False
+        code = error.args[0] if error.args else None
+        if isinstance(code, int) and code in _NETWORK_ERROR_CODES:
+            return True
+        if _NETWORK_ERROR_RE.search(message):
+            return True
+        error = getattr(error, 'orig', None) or error.__cause__
+    return False
+
+
+class _TargetState:
+    __slots__ = ('failures', 'open_until', 'last_error')
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+        self.last_error = ''
+
+
+class CircuitBreaker:
+    """记录近期连接失败的目标库，在退避窗口内直接拒绝请求"""
+
+    def __init__(self, base_backoff: float = BASE_BACKOFF, max_backoff: float = MAX_BACKOFF):
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._states: dict[tuple, _TargetState] = {}
+        self._lock = threading.Lock()
+
+    def check(self, key: tuple) -> None:
+        """目标库处于熔断期时抛出 DatabaseUnavailableError"""
+        with self._lock:
+            state = self._states.get(key)
+            if state is None:
+                return
+            remaining = state.open_until - time.monotonic()
+            if remaining > 0:
+                # 不回显上次的错误内容，它可能来自其他调用方
+                raise DatabaseUnavailableError(
+                    f"数据库近期连接失败，{remaining:.0f} 秒内暂停访问"
+                )
+
+    def is_open(self, key: tuple) -> bool:
+        with self._lock:
+            state = self._states.get(key)
+            return state is not None and state.open_until > time.monotonic()
+
+    def record_failure(self, key: tuple, error: Exception) -> None:
+        with self._lock:
+            state = self._states.setdefault(key, _TargetState())
+            backoff = min(self.base_backoff * (2 ** state.failures), self.max_backoff)
+            state.failures += 1
+            state.open_until = time.monotonic() + backoff
+            state.last_error = str(error)
+        print(f"Circuit opened for {key} ({backoff:.0f}s): {state.last_error}")
+
+    def record_success(self, key: tuple) -> None:
+        with self._lock:
+            self._states.pop(key, None)
+
+
+breaker = CircuitBreaker()
+
+
+@contextmanager
+def guard(key: tuple):
+    """
+    熔断保护：熔断期内快速失败；连接失败时开启熔断，成功后复位
+    """
+    breaker.check(key)
+    try:
+        yield
+    except DatabaseUnavailableError as e:
+        breaker.record_failure(key, e)
+        raise
+    else:
+        breaker.record_success(key)
@@ -0,0 +1,57 @@
+# utils/compression.py
+import zlib
+from collections.abc import Callable
+from typing import Any
+
+COMPRESSIONS = {'none', 'gzip', 'zstd'}
+# 压缩后的 MIME 类型与文件扩展名
+_FORMATS = {
+    'gzip': ('application/gzip', '.gz'),
+    'zstd': ('application/zstd', '.zst')
+}
+DEFAULT_LEVELS = {'gzip': 6, 'zstd': 3}
+
+
+class StreamCompressor:
+    """
+    增量压缩：每写入一块数据即压缩并写入 sink，不在内存中保留完整的原始内容
+
+    gzip 使用 zlib（wbits=31 输出 gzip 头），zstd 需要安装可选依赖 zstandard
+    """
+
+    def __init__(self, method: str, sink: Callable[[bytes], Any], level: int | None = None):
+        if method not in ('gzip', 'zstd'):
+            raise ValueError(f"不支持的压缩方式: {method}。支持方式: {', '.join(sorted(COMPRESSIONS))}")
+        self.method = method
+        self.sink = sink
+        level = DEFAULT_LEVELS[method] if level is None else int(level)
+        if method == 'gzip':
+            self._compressor = zlib.compressobj(max(1, min(level, 9)), zlib.DEFLATED, 31)
+        else:
+            try:
+                import zstandard
+            except ImportError:
+                raise ValueError("zstd 压缩需要安装 zstandard，请改用 gzip 或安装该依赖")
+            self._compressor = zstandard.ZstdCompressor(level=max(1, min(level, 22))).compressobj()
+        self.raw_bytes = 0
+
+    def write(self, data: bytes) -> None:
+        self.raw_bytes += len(data)
+        compressed = self._compressor.compress(data)
+        if compressed:
+            self.sink(compressed)
+
+    def close(self) -> None:
+        self.sink(self._compressor.flush())
+
+
+def compressed_meta(meta: dict, method: str) -> dict:
+    """压缩后的 blob 元数据：MIME 类型与扩展名随压缩方式变化，保留原始类型"""
+    mime_type, suffix = _FORMATS[method]
+    return {
+        **meta,
+        'mime_type': mime_type,
+        'filename': meta['filename'] + suffix,
+        'content_encoding': method,
+        'original_mime_type': meta['mime_type']
+    }
@@ -0,0 +1,174 @@
+# utils/explain.py
+import json
+import uuid
+import xml.etree.ElementTree as ET
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+EXPLAIN_MODES = {'off', 'warn', 'reject'}
+_SHOWPLAN_NS = '{http://schemas.microsoft.com/sqlserver/2004/07/showplan}'
+_SQLSERVER_SCAN_OPS = {'Table Scan', 'Clustered Index Scan', 'Index Scan'}
+
+
+def explain_plan(conn: Connection, db_type: str, sql: str,
+                 params: dict[str, Any] | None = None) -> dict[str, Any]:
+    """
+    执行数据库的 EXPLAIN 并提取摘要
+
+    :return: {'estimated_rows': 预估扫描行数, 'estimated_cost': 预估代价, 'full_scans': [全表扫描的表]}
+    """
+    sql = sql.strip().rstrip(';')
+    params = params or {}
+    explainers = {
+        'mysql': _explain_mysql,
+        'postgresql': _explain_postgresql,
+        'sqlserver': _explain_sqlserver,
+        'oracle': _explain_oracle
+    }
+    explainer = explainers.get(db_type.lower())
+    if explainer is None:
+        raise ValueError(f"不支持获取执行计划的数据库类型: {db_type}")
+    return explainer(conn, sql, params)
+
+
+def check_plan(summary: dict[str, Any], max_rows: float | None = None,
+               max_cost: float | None = None, block_full_scan: bool = False) -> list[str]:
+    """根据阈值检查执行计划，返回超限说明"""
+    violations = []
+    rows, cost = summary.get('estimated_rows'), summary.get('estimated_cost')
+    if max_rows and rows is not None and rows > max_rows:
+        violations.append(f"预估扫描行数 {rows:.0f} 超过阈值 {max_rows:.0f}")
+    if max_cost and cost is not None and cost > max_cost:
+        violations.append(f"预估代价 {cost:.2f} 超过阈值 {max_cost:.2f}")
+    if block_full_scan and summary.get('full_scans'):
+        violations.append(f"存在全表扫描: {', '.join(summary['full_scans'])}")
+    return violations
+
+
+def _explain_mysql(conn: Connection, sql: str, params: dict) -> dict[str, Any]:
+    raw = conn.execute(text(f"EXPLAIN FORMAT=JSON {sql}"), params).scalar()
+    return _summarize_mysql(json.loads(raw) if isinstance(raw, str) else raw)
+
+
+def _summarize_mysql(plan: dict) -> dict[str, Any]:
+    """从 EXPLAIN FORMAT=JSON 的结果提取摘要"""
+    query_block = plan.get('query_block', {})
+
+    rows, full_scans = 0.0, []
+    for node in _walk(query_block):
+        table = node.get('table')
+        if isinstance(table, dict):
+            rows += float(table.get('rows_examined_per_scan') or 0)
+            if table.get('access_type') == 'ALL':
+                full_scans.append(table.get('table_name', ''))
+    cost = query_block.get('cost_info', {}).get('query_cost')
+    return {
+        'estimated_rows': rows,
+        'estimated_cost': float(cost) if cost is not None else None,
+        'full_scans': full_scans
+    }
+
+
+def _explain_postgresql(conn: Connection, sql: str, params: dict) -> dict[str, Any]:
+    raw = conn.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"), params).scalar()
+    return _summarize_postgresql(json.loads(raw) if isinstance(raw, str) else raw)
+
+
+def _summarize_postgresql(result: list) -> dict[str, Any]:
+    """从 EXPLAIN (FORMAT JSON) 的结果提取摘要"""
+    plan = result[0]['Plan']
+
+    rows, full_scans = 0.0, []
+    for node in _walk(plan):
+        if 'Node Type' not in node:
+            continue
+        if node['Node Type'] == 'Seq Scan':
+            full_scans.append(node.get('Relation Name', ''))
+            rows += float(node.get('Plan Rows') or 0)
+        elif node['Node Type'].endswith('Scan'):
+            rows += float(node.get('Plan Rows') or 0)
+    return {
+        'estimated_rows': rows or float(plan.get('Plan Rows') or 0),
+        'estimated_cost': float(plan.get('Total Cost') or 0),
+        'full_scans': full_scans
+    }
+
+
+def _explain_sqlserver(conn: Connection, sql: str, params: dict) -> dict[str, Any]:
+    # SHOWPLAN_XML 必须单独成批，开启后语句只编译不执行
+    conn.exec_driver_sql("SET SHOWPLAN_XML ON")
+    try:
+        raw = conn.execute(text(sql), params).scalar()
+    finally:
+        conn.exec_driver_sql("SET SHOWPLAN_XML OFF")
+    return _summarize_sqlserver(raw)
+
+
+def _summarize_sqlserver(raw: str) -> dict[str, Any]:
+    """从 SHOWPLAN_XML 提取摘要"""
+    root = ET.fromstring(raw)
+    cost, rows = 0.0, 0.0
+    for stmt in root.iter(f'{_SHOWPLAN_NS}StmtSimple'):
+        cost += float(stmt.get('StatementSubTreeCost') or 0)
+    full_scans = []
+    for op in root.iter(f'{_SHOWPLAN_NS}RelOp'):
+        if op.get('PhysicalOp') in _SQLSERVER_SCAN_OPS or op.get('PhysicalOp', '').endswith('Seek'):
+            rows += float(op.get('EstimatedRowsRead') or op.get('EstimateRows') or 0)
+        if op.get('PhysicalOp') in _SQLSERVER_SCAN_OPS:
+            obj = op.find(f'.//{_SHOWPLAN_NS}Object')
+            if obj is not None:
+                full_scans.append(obj.get('Table', '').strip('[]'))
+    return {
+        'estimated_rows': rows,
+        'estimated_cost': cost,
+        'full_scans': list(dict.fromkeys(full_scans))
+    }
+
+
+def _explain_oracle(conn: Connection, sql: str, params: dict) -> dict[str, Any]:
+    statement_id = f"rk_{uuid.uuid4().hex[:20]}"
+    # EXPLAIN PLAN 不绑定取值，绑定变量原样交给优化器
+    conn.exec_driver_sql(f"EXPLAIN PLAN SET STATEMENT_ID = '{statement_id}' FOR {sql}")
+    try:
+        rows = conn.execute(text("""
+            SELECT id, operation, options, object_name, cost, cardinality
+            FROM PLAN_TABLE
+            WHERE statement_id = :statement_id
+            ORDER BY id
+        """), {'statement_id': statement_id}).fetchall()
+    finally:
+        conn.execute(
+            text("DELETE FROM PLAN_TABLE WHERE statement_id = :statement_id"),
+            {'statement_id': statement_id}
+        )
+    return _summarize_oracle(rows)
+
+
+def _summarize_oracle(rows: list[tuple]) -> dict[str, Any]:
+    """从 PLAN_TABLE 的 (id, operation, options, object_name, cost, cardinality) 行提取摘要"""
+    cost, scanned, full_scans = None, 0.0, []
+    for plan_id, operation, options, object_name, step_cost, cardinality in rows:
+        if plan_id == 0:
+            cost = float(step_cost) if step_cost is not None else None
+        if operation == 'TABLE ACCESS' or operation == 'INDEX':
+            scanned += float(cardinality or 0)
+        if operation == 'TABLE ACCESS' and options == 'FULL':
+            full_scans.append(object_name)
+    return {
+        'estimated_rows': scanned,
+        'estimated_cost': cost,
+        'full_scans': full_scans
+    }
+
+
+def _walk(node: Any):
+    """深度优先遍历 JSON 执行计划中的所有字典节点"""
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk(item)
@@ -0,0 +1,102 @@
+# utils/export_worker.py
+"""
+导出编码进程：python -m utils.export_worker
+
+由 ParallelEncoder 以独立的解释器启动（exec，不经 fork），只导入标准库，
+不导入插件入口 main.py、gevent 与数据库连接池。父子进程通过标准输入输出交换帧：
+启动后先收到一次 (格式, 列名)，之后每收到一个行批次即编码并写回，进程内按顺序处理。
+"""
+import csv
+import pickle
+import struct
+import sys
+from datetime import date, datetime
+from decimal import Decimal
+from io import StringIO
+from typing import Any, BinaryIO
+
+# 帧头：类型（1 字节）+ 长度（4 字节，网络字节序）
+_FRAME = struct.Struct('!BI')
+FRAME_INIT = 0     # 父 -> 子：pickle 的 (格式, 列名)，每个进程只发送一次
+FRAME_BATCH = 1    # 父 -> 子：pickle 的行元组列表；子 -> 父：编码结果
+FRAME_ERROR = 2    # 子 -> 父：错误信息
+
+
+def serialize_value(value: Any) -> Any:
+    """导出与 JSON 输出共用的取值转换，RookieExecuteSqlTool._custom_serializer 直接使用该函数"""
+    if isinstance(value, (datetime, date)):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, bytes):
+        return value.decode('utf-8', errors='replace')
+    return str(value)
+
+
+def encode_batch(rows: list[tuple], fmt: str) -> bytes:
+    """编码一批行，与单线程导出的输出逐字节一致"""
+    if fmt == 'csv':
+        output = StringIO()
+        writer = csv.writer(output)
+        writer.writerows([serialize_value(v) for v in row] for row in rows)
+        return output.getvalue().encode('utf-8')
+    return "".join(
+        "<tr>" + "".join(f"<td>{serialize_value(v)}</td>" for v in row) + "</tr>"
+        for row in rows
+    ).encode('utf-8')
+
+
+def write_frame(stream: BinaryIO, kind: int, payload: bytes) -> None:
+    stream.write(_FRAME.pack(kind, len(payload)))
+    stream.write(payload)
+    stream.flush()
+
+
+def read_frame(stream: BinaryIO) -> tuple[int, bytes] | None:
+    """读取一帧，对端关闭时返回 None"""
+    head = _read_exact(stream, _FRAME.size)
+    if head is None:
+        return None
+    kind, size = _FRAME.unpack(head)
+    payload = _read_exact(stream, size)
+    if payload is None:
+        return None
+    return kind, payload
+
+
+def _read_exact(stream: BinaryIO, size: int) -> bytes | None:
+    chunks, remaining = [], size
+    while remaining:
+        chunk = stream.read(remaining)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
+
+
+def main() -> None:
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    fmt, columns = 'csv', []
+    try:
+        while (frame := read_frame(stdin)) is not None:
+            kind, payload = frame
+            try:
+                if kind == FRAME_INIT:
+                    fmt, columns = pickle.loads(payload)
+                    continue
+                rows = pickle.loads(payload)
+                if rows and len(rows[0]) != len(columns):
+                    raise ValueError(f"行的字段数 {len(rows[0])} 与列数 {len(columns)} 不一致")
+                data = encode_batch(rows, fmt)
+            except Exception as e:
+                write_frame(stdout, FRAME_ERROR, f"{type(e).__name__}: {e}".encode('utf-8'))
+                continue
+            write_frame(stdout, FRAME_BATCH, data)
+    except BrokenPipeError:
+        # 父进程放弃导出时会关闭管道
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+# utils/parallel_export.py
+import csv
+import io
+import os
+import pickle
+import subprocess
+import sys
+from collections import deque
+from collections.abc import Callable
+from itertools import chain
+from concurrent.futures import Executor
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+from utils.background import native_thread_pool
+from utils.export_worker import FRAME_BATCH, FRAME_ERROR, FRAME_INIT, read_frame, serialize_value, write_frame
+
+EXPORT_FORMATS = {'csv', 'html'}
+# 每个批次的行数
+DEFAULT_BATCH_ROWS = int(os.getenv('ROOKIE_EXPORT_BATCH_ROWS', 20000))
+# 编码进程在 python -m utils.export_worker 中以插件根目录为工作目录
+_PLUGIN_ROOT = Path(__file__).resolve().parent.parent
+# 编码进程只用标准库即可还原的取值类型，其余类型（驱动特有的类型、memoryview 等）在本进程转换后传输
+_PORTABLE_TYPES = frozenset({
+    type(None), bool, int, float, str, bytes, datetime, date, time, timedelta, Decimal, UUID
+})
+
+
+def encode_header(columns: list[str], fmt: str) -> bytes:
+    if fmt == 'csv':
+        output = StringIO()
+        csv.writer(output).writerow(columns)
+        return output.getvalue().encode('utf-8-sig')
+    return (
+        "<table class='table table-bordered table-striped'><thead><tr>"
+        + "".join(f"<th>{key}</th>" for key in columns)
+        + "</tr></thead><tbody>"
+    ).encode('utf-8')
+
+
+def encode_footer(fmt: str) -> bytes:
+    return b"</tbody></table>" if fmt == 'html' else b""
+
+
+class _BatchPickler(pickle.Pickler):
+    """含其他类型取值的批次：这些取值先按导出规则转为字符串，编码进程无需导入驱动模块"""
+
+    def reducer_override(self, obj: Any) -> Any:
+        if isinstance(obj, type) or type(obj) in _PORTABLE_TYPES:
+            return NotImplemented
+        return str, (str(serialize_value(obj)),)
+
+
+def dump_rows(rows: list[tuple]) -> bytes:
+    """将行批次序列化为发给编码进程的缓冲区"""
+    if _PORTABLE_TYPES.issuperset(map(type, chain.from_iterable(rows))):
+        # 常见情况：全部为标准类型，由 C 实现直接序列化
+        return pickle.dumps(rows, protocol=pickle.HIGHEST_PROTOCOL)
+    output = io.BytesIO()
+    _BatchPickler(output, protocol=pickle.HIGHEST_PROTOCOL).dump(rows)
+    return output.getvalue()
+
+
+class ParallelEncoder:
+    """
+    将行批次交给编码进程，按提交顺序把编码结果写入 sink
+
+    编码进程以 python -m utils.export_worker 启动为独立的解释器，不经 fork，
+    不会复制连接池套接字与各模块的锁，也不导入插件入口与 gevent。
+    列信息在进程启动后只发送一次，之后每个批次以行元组列表的 pickle 缓冲区经管道传输。
+    批次轮流交给空闲进程，每个进程同时只处理一个批次，读取下一批行时其他进程仍在编码；
+    所有进程都在忙时先按提交顺序取回最早的结果，读取速度快于编码时阻塞读取方。
+    写入 sink（可能包含压缩）在系统线程中进行，不阻塞事件循环。
+    """
+
+    def __init__(self, fmt: str, sink: Callable[[bytes], Any], workers: int):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"并行导出不支持的格式: {fmt}。支持格式: {', '.join(sorted(EXPORT_FORMATS))}")
+        self.fmt = fmt
+        self.sink = sink
+        self.workers = max(1, min(workers, os.cpu_count() or 1))
+        self.processes: list[subprocess.Popen] = []
+        self.idle: deque[subprocess.Popen] = deque()
+        self.pending: deque[subprocess.Popen] = deque()
+        self.writer: Executor | None = None
+        self.columns: list[str] | None = None
+        self.rows = 0
+
+    def feed(self, columns: list[str], rows: list[tuple]) -> None:
+        if self.columns is None:
+            self.columns = columns
+            self._start()
+            self._write(encode_header(columns, self.fmt))
+        if not self.idle:
+            self._collect()
+        process = self.idle.popleft()
+        write_frame(process.stdin, FRAME_BATCH, dump_rows(rows))
+        self.pending.append(process)
+        self.rows += len(rows)
+
+    def _start(self) -> None:
+        init = pickle.dumps((self.fmt, list(self.columns)), protocol=pickle.HIGHEST_PROTOCOL)
+        for _ in range(self.workers):
+            process = subprocess.Popen(
+                [sys.executable, '-m', 'utils.export_worker'],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, cwd=_PLUGIN_ROOT
+            )
+            self.processes.append(process)
+            write_frame(process.stdin, FRAME_INIT, init)
+            self.idle.append(process)
+        self.writer = native_thread_pool(1)
+
+    def _collect(self) -> None:
+        """取回最早提交的批次并写入 sink"""
+        process = self.pending.popleft()
+        frame = read_frame(process.stdout)
+        if frame is None:
+            raise ValueError(f"导出编码进程异常退出，退出码 {process.poll()}")
+        kind, payload = frame
+        if kind == FRAME_ERROR:
+            raise ValueError(f"导出编码失败：{payload.decode('utf-8', errors='replace')}")
+        self.idle.append(process)
+        self._write(payload)
+
+    def _write(self, data: bytes) -> None:
+        # 逐块等待写入完成，保证顺序
+        self.writer.submit(self.sink, data).result()
+
+    def close(self) -> None:
+        """写出剩余批次与结尾"""
+        try:
+            while self.pending:
+                self._collect()
+            if self.columns is not None:
+                self._write(encode_footer(self.fmt))
+        finally:
+            self.shutdown()
+
+    def shutdown(self) -> None:
+        """关闭管道后编码进程自行退出，未按时退出的进程强制结束"""
+        for process in self.processes:
+            for stream in (process.stdin, process.stdout):
+                try:
+                    stream.close()
+                except OSError:
+                    pass
+        for process in self.processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self.processes.clear()
+        self.idle.clear()
+        self.pending.clear()
+        if self.writer is not None:
+            self.writer.shutdown(wait=True)
+            self.writer = None
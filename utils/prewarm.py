@@ -0,0 +1,39 @@
+# utils/prewarm.py
+import os
+import time
+from typing import Any
+
+from utils.background import run_in_background
+
+# 启动后在后台预加载的数据库类型，逗号分隔，例如 "mysql,postgresql"；为空时不预热
+PREWARM_DIALECTS = os.getenv('ROOKIE_PREWARM_DIALECTS', '')
+
+
+def prewarm(dialects: list[str]) -> None:
+    """预先导入检查器、SQLAlchemy 方言与驱动，并编译提示词模板"""
+    start = time.perf_counter()
+    from sqlalchemy.engine.url import make_url
+    from database_schema.factory import InspectorFactory
+    from utils.alchemy_db_client import _get_driver
+    from utils.prompt_loader import PromptLoader
+
+    for db_type in dialects:
+        try:
+            InspectorFactory.get_inspector_class(db_type)
+            name = 'mssql' if db_type == 'sqlserver' else db_type
+            make_url(f"{name}+{_get_driver(db_type)}://").get_dialect().import_dbapi()
+        except Exception as e:
+            print(f"Prewarm {db_type} failed: {str(e)}")
+
+    loader = PromptLoader()
+    for template in loader.env.list_templates():
+        loader.env.get_template(template)
+    print(f"Prewarmed {', '.join(dialects)} in {time.perf_counter() - start:.2f}s")
+
+
+def start_prewarm(dialects: str = PREWARM_DIALECTS) -> Any:
+    """在后台系统线程中预热，不阻塞插件启动与 gevent 事件循环"""
+    names = [d.strip().lower() for d in dialects.split(',') if d.strip()]
+    if not names:
+        return None
+    return run_in_background(prewarm, names)
@@ -15,7 +15,8 @@ class PromptLoader:
         db_type: str, 
         context: dict,
         limit: int = 100,
-        user_custom_prompt: str | None = None  # 新增自定义参数
+        user_custom_prompt: str | None = None,  # 新增自定义参数
+        parameterized: bool = False
     ) -> str:
         try:
             template = self.env.get_template(f"{db_type.lower()}_prompt.jinja")
@@ -27,7 +28,8 @@ class PromptLoader:
             'limit_clause': self._get_limit_clause(db_type),
             'optimization_rules': self._get_optimization_rules(db_type),
             'user_custom_prompt': user_custom_prompt,  # 新增
-            'limit': limit
+            'limit': limit,
+            'parameterized': parameterized
         })
         return template.render(context)
     
@@ -0,0 +1,364 @@
+# utils/query_stats.py
+import argparse
+import atexit
+import bisect
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any
+
+from utils.background import run_in_background
+
+# 保留的指纹数量上限，超出后淘汰最久未出现的指纹
+MAX_FINGERPRINTS = int(os.getenv('ROOKIE_QUERY_STATS_MAX', 1000))
+# 慢查询阈值（毫秒）
+SLOW_QUERY_MS = float(os.getenv('ROOKIE_SLOW_QUERY_MS', 1000))
+# 内存中保留的慢查询条数
+SLOW_LOG_SIZE = int(os.getenv('ROOKIE_SLOW_LOG_SIZE', 200))
+# SQLite 持久化文件，为空时只保存在内存中
+STATS_DB = os.getenv('ROOKIE_QUERY_STATS_DB', '')
+# 持久化 / 日志输出间隔（秒）
+FLUSH_INTERVAL = float(os.getenv('ROOKIE_QUERY_STATS_FLUSH_INTERVAL', 30))
+# 每个间隔输出到日志的开销最大指纹数，为 0 时不输出；不依赖 ROOKIE_QUERY_STATS_DB
+LOG_TOP = int(os.getenv('ROOKIE_QUERY_STATS_LOG_TOP', 0))
+
+# 延迟直方图的桶上界（毫秒），最后一个桶为 +inf
+LATENCY_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+_STRING_RE = re.compile(r"[NnEeXxBb]?'(?:[^']|'')*'")
+_COMMENT_RE = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_NUMBER_RE = re.compile(r"(?<![\w$#])-?\d+(?:\.\d*)?(?:[eE][+-]?\d+)?\b")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_RE = re.compile(r"(\(\?(?:,\s*\?)*\))(?:\s*,\s*\1)+")
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """去掉注释与字面量，得到同一类语句共享的指纹文本"""
+    sql = _COMMENT_RE.sub(' ', sql)
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _WS_RE.sub(' ', sql).strip().rstrip(';').strip()
+    sql = _IN_LIST_RE.sub('(?+)', sql)
+    sql = _VALUES_RE.sub(r'\1+', sql)
+    return sql.lower()
+
+
+def fingerprint(db_type: str, sql: str) -> tuple[str, str]:
+    """返回 (指纹 ID, 规范化语句)"""
+    normalized = normalize_sql(sql)
+    digest = hashlib.blake2b(f"{db_type.lower()}\x00{normalized}".encode('utf-8'), digest_size=8)
+    return digest.hexdigest(), normalized
+
+
+class _QueryStats:
+    __slots__ = ('db_type', 'normalized', 'sample', 'count', 'errors', 'total_ms', 'max_ms',
+                 'buckets', 'rows', 'bytes', 'first_seen', 'last_seen', 'version', 'flushed')
+
+    def __init__(self, db_type: str, normalized: str, sample: str):
+        self.db_type = db_type
+        self.normalized = normalized
+        self.sample = sample
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.rows = 0
+        self.bytes = 0
+        self.first_seen = time.time()
+        self.last_seen = self.first_seen
+        # 每次变更递增 version，写入成功后 flushed 记为写入时的 version
+        self.version = 1
+        self.flushed = 0
+
+    def percentile(self, q: float) -> float | None:
+        """按直方图估算分位数（返回所在桶的上界）"""
+        if not self.count:
+            return None
+        target, seen = q * self.count, 0
+        for bound, hits in zip(LATENCY_BUCKETS + (float('inf'),), self.buckets):
+            seen += hits
+            if seen >= target:
+                return bound if bound != float('inf') else self.max_ms
+        return self.max_ms
+
+    def to_dict(self, fingerprint_id: str) -> dict[str, Any]:
+        return {
+            'fingerprint': fingerprint_id,
+            'db_type': self.db_type,
+            'sql': self.normalized,
+            'sample': self.sample,
+            'count': self.count,
+            'errors': self.errors,
+            'total_ms': round(self.total_ms, 2),
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else 0,
+            'p95_ms': self.percentile(0.95),
+            'max_ms': round(self.max_ms, 2),
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'histogram': dict(zip([str(b) for b in LATENCY_BUCKETS] + ['inf'], self.buckets)),
+            'last_seen': self.last_seen
+        }
+
+
+class QueryStatsStore:
+    """按指纹聚合的查询统计与慢查询日志，可选持久化到 SQLite"""
+
+    def __init__(self, max_fingerprints: int = MAX_FINGERPRINTS, slow_ms: float = SLOW_QUERY_MS,
+                 db_path: str = STATS_DB, flush_interval: float = FLUSH_INTERVAL,
+                 log_top: int = LOG_TOP):
+        self.max_fingerprints = max_fingerprints
+        self.slow_ms = slow_ms
+        self.db_path = db_path
+        self.flush_interval = flush_interval
+        self.log_top = log_top
+        self._stats: OrderedDict[str, _QueryStats] = OrderedDict()
+        self._slow_log: deque[dict] = deque(maxlen=SLOW_LOG_SIZE)
+        self._pending_slow: list[dict] = []
+        self._lock = threading.Lock()
+        # 后台写入与退出时的写入互斥
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._reporting = False
+        if db_path:
+            self._load()
+        if db_path or log_top:
+            atexit.register(self._report)
+
+    def record(self, db_type: str, sql: str, elapsed: float, rows: int = 0,
+               error: bool = False) -> str:
+        """记录一次执行，elapsed 为秒；返回指纹 ID"""
+        fingerprint_id, normalized = fingerprint(db_type, sql)
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            stats = self._get(fingerprint_id, db_type, normalized, sql)
+            stats.count += 1
+            stats.errors += int(error)
+            stats.total_ms += elapsed_ms
+            stats.max_ms = max(stats.max_ms, elapsed_ms)
+            stats.buckets[bisect.bisect_left(LATENCY_BUCKETS, elapsed_ms)] += 1
+            stats.rows += rows
+            stats.last_seen = time.time()
+            stats.version += 1
+            if elapsed_ms >= self.slow_ms:
+                entry = {
+                    'fingerprint': fingerprint_id,
+                    'db_type': db_type,
+                    'sql': sql[:2000],
+                    'elapsed_ms': round(elapsed_ms, 2),
+                    'rows': rows,
+                    'error': error,
+                    'at': stats.last_seen
+                }
+                self._slow_log.append(entry)
+                self._pending_slow.append(entry)
+                # 持续写入失败时待写慢查询同样有上限
+                if len(self._pending_slow) > SLOW_LOG_SIZE * 10:
+                    del self._pending_slow[0]
+                print(f"Slow query {fingerprint_id} {elapsed_ms:.0f}ms: {normalized[:200]}")
+        self._maybe_flush()
+        return fingerprint_id
+
+    def add_bytes(self, db_type: str, sql: str, size: int) -> None:
+        """累加结果序列化后的字节数"""
+        fingerprint_id, _ = fingerprint(db_type, sql)
+        with self._lock:
+            stats = self._stats.get(fingerprint_id)
+            if stats is not None:
+                stats.bytes += size
+                stats.version += 1
+
+    def _get(self, fingerprint_id: str, db_type: str, normalized: str, sql: str) -> _QueryStats:
+        stats = self._stats.get(fingerprint_id)
+        if stats is None:
+            stats = _QueryStats(db_type, normalized, sql[:2000])
+            self._stats[fingerprint_id] = stats
+            while len(self._stats) > self.max_fingerprints:
+                self._stats.popitem(last=False)
+        self._stats.move_to_end(fingerprint_id)
+        return stats
+
+    def top(self, n: int = 10, by: str = 'total_ms') -> list[dict[str, Any]]:
+        """按 total_ms / avg_ms / max_ms / count / rows / bytes / errors 排序的前 n 个指纹"""
+        with self._lock:
+            items = [stats.to_dict(fid) for fid, stats in self._stats.items()]
+        if items and by not in items[0]:
+            raise ValueError(f"不支持的排序字段: {by}")
+        return sorted(items, key=lambda item: item[by] or 0, reverse=True)[:n]
+
+    def slow_queries(self, n: int = 50) -> list[dict[str, Any]]:
+        with self._lock:
+            return list(self._slow_log)[-n:][::-1]
+
+    def _maybe_flush(self) -> None:
+        """到达间隔时在后台线程中持久化并输出日志，不占用查询路径"""
+        if not (self.db_path or self.log_top):
+            return
+        with self._lock:
+            if self._reporting or time.monotonic() - self._last_flush < self.flush_interval:
+                return
+            self._reporting = True
+            self._last_flush = time.monotonic()
+        run_in_background(self._report)
+
+    def _report(self) -> None:
+        try:
+            if self.log_top:
+                print(f"Query stats top {self.log_top} by total_ms:\n{format_top(self.top(self.log_top))}")
+            if self.db_path:
+                self.flush()
+        except sqlite3.Error as e:
+            print(f"Failed to persist query stats: {str(e)}")
+        finally:
+            with self._lock:
+                self._reporting = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS query_stats (
+                fingerprint TEXT PRIMARY KEY, db_type TEXT, normalized TEXT, sample TEXT,
+                count INTEGER, errors INTEGER, total_ms REAL, max_ms REAL, buckets TEXT,
+                rows INTEGER, bytes INTEGER, first_seen REAL, last_seen REAL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS slow_queries (
+                fingerprint TEXT, db_type TEXT, sql TEXT, elapsed_ms REAL,
+                rows INTEGER, error INTEGER, at REAL
+            )
+        """)
+        return conn
+
+    def flush(self) -> None:
+        """
+        将变更的指纹与新的慢查询写入 SQLite
+
+        写入成功后才清除变更标记与待写慢查询，失败时保留到下一次写入
+        """
+        if not self.db_path:
+            return
+        with self._flush_lock:
+            self._flush()
+
+    def _flush(self) -> None:
+        with self._lock:
+            dirty = [
+                (stats, stats.version,
+                 (fid, stats.db_type, stats.normalized, stats.sample, stats.count, stats.errors,
+                  stats.total_ms, stats.max_ms, ','.join(map(str, stats.buckets)), stats.rows,
+                  stats.bytes, stats.first_seen, stats.last_seen))
+                for fid, stats in self._stats.items() if stats.version != stats.flushed
+            ]
+            slow = list(self._pending_slow)
+
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO query_stats VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)",
+                    [row for _, _, row in dirty]
+                )
+                conn.executemany(
+                    "INSERT INTO slow_queries VALUES (?,?,?,?,?,?,?)",
+                    [(e['fingerprint'], e['db_type'], e['sql'], e['elapsed_ms'], e['rows'],
+                      int(e['error']), e['at']) for e in slow]
+                )
+                # 持久化的慢查询同样有上限
+                conn.execute(
+                    "DELETE FROM slow_queries WHERE rowid NOT IN "
+                    "(SELECT rowid FROM slow_queries ORDER BY at DESC LIMIT ?)",
+                    (SLOW_LOG_SIZE * 10,)
+                )
+        finally:
+            conn.close()
+
+        with self._lock:
+            for stats, version, _ in dirty:
+                stats.flushed = max(stats.flushed, version)
+            # 写入期间新增的慢查询保留到下一次写入
+            written = {id(entry) for entry in slow}
+            self._pending_slow = [e for e in self._pending_slow if id(e) not in written]
+
+    def _load(self) -> None:
+        """启动时读取已持久化的统计"""
+        try:
+            conn = self._connect()
+        except sqlite3.Error as e:
+            print(f"Failed to load query stats: {str(e)}")
+            return
+        try:
+            rows = conn.execute(
+                "SELECT * FROM query_stats ORDER BY last_seen DESC LIMIT ?", (self.max_fingerprints,)
+            ).fetchall()
+            slow = conn.execute(
+                "SELECT * FROM slow_queries ORDER BY at DESC LIMIT ?", (SLOW_LOG_SIZE,)
+            ).fetchall()
+        finally:
+            conn.close()
+        for (fid, db_type, normalized, sample, count, errors, total_ms, max_ms, buckets,
+             row_count, size, first_seen, last_seen) in reversed(rows):
+            stats = _QueryStats(db_type, normalized, sample)
+            stats.count, stats.errors = count, errors
+            stats.total_ms, stats.max_ms = total_ms, max_ms
+            loaded = [int(b) for b in buckets.split(',')]
+            if len(loaded) == len(stats.buckets):
+                stats.buckets = loaded
+            stats.rows, stats.bytes = row_count, size
+            stats.first_seen, stats.last_seen = first_seen, last_seen
+            stats.flushed = stats.version
+            self._stats[fid] = stats
+        for fid, db_type, sql, elapsed_ms, row_count, error, at in reversed(slow):
+            self._slow_log.append({
+                'fingerprint': fid, 'db_type': db_type, 'sql': sql, 'elapsed_ms': elapsed_ms,
+                'rows': row_count, 'error': bool(error), 'at': at
+            })
+
+
+stats_store = QueryStatsStore()
+
+
+def format_top(items: list[dict[str, Any]]) -> str:
+    """以文本表格输出指纹统计"""
+    lines = [f"{'fingerprint':<18}{'count':>8}{'errors':>8}{'total_ms':>12}{'avg_ms':>10}"
+             f"{'p95_ms':>10}{'max_ms':>10}{'rows':>10}{'bytes':>12}  sql"]
+    for item in items:
+        lines.append(
+            f"{item['fingerprint']:<18}{item['count']:>8}{item['errors']:>8}{item['total_ms']:>12.1f}"
+            f"{item['avg_ms']:>10.1f}{item['p95_ms'] or 0:>10.0f}{item['max_ms']:>10.1f}"
+            f"{item['rows']:>10}{item['bytes']:>12}  {item['sql'][:120]}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    """输出持久化统计中开销最大的指纹：python -m utils.query_stats --db stats.db --top 20"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', default=STATS_DB, help='ROOKIE_QUERY_STATS_DB 指定的 SQLite 文件')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--by', default='total_ms',
+                        choices=['total_ms', 'avg_ms', 'max_ms', 'count', 'rows', 'bytes', 'errors'])
+    parser.add_argument('--slow', action='store_true', help='输出最近的慢查询')
+    args = parser.parse_args()
+    if not args.db or not os.path.exists(args.db):
+        raise SystemExit(
+            "未找到统计文件，请通过 --db 或 ROOKIE_QUERY_STATS_DB 指定；"
+            "未持久化时可设置 ROOKIE_QUERY_STATS_LOG_TOP 在插件日志中定期输出"
+        )
+
+    store = QueryStatsStore(max_fingerprints=10 ** 9, db_path=args.db)
+    if args.slow:
+        for entry in store.slow_queries(args.top):
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(entry['at']))} "
+                  f"{entry['elapsed_ms']:>10.1f}ms {entry['fingerprint']} {entry['sql'][:160]}")
+    else:
+        print(format_top(store.top(args.top, args.by)))
+
+
+if __name__ == '__main__':
+    main()
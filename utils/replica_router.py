@@ -0,0 +1,181 @@
+# utils/replica_router.py
+import itertools
+import os
+import random
+import socket
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from typing import Any
+
+from utils.admission import admit, target_key, AdmissionRejected
+from utils.circuit_breaker import guard, breaker, DatabaseUnavailableError
+
+ROUTING_POLICIES = {'round_robin', 'least_outstanding', 'latency_weighted'}
+DEFAULT_POLICY = 'round_robin'
+# 主动健康检查间隔（秒）
+HEALTH_CHECK_INTERVAL = float(os.getenv('ROOKIE_HEALTH_CHECK_INTERVAL', 15))
+# 延迟指数滑动平均系数
+_EWMA_ALPHA = 0.3
+
+
+def parse_endpoints(host: str, port: int) -> list[tuple[str, int]]:
+    """
+    解析节点列表，支持 "db1,db2:3307" 形式，未写端口的节点使用 port
+    """
+    endpoints = []
+    for item in str(host).split(','):
+        item = item.strip()
+        if not item:
+            continue
+        if item.count(':') == 1:
+            node, node_port = item.split(':')
+            endpoints.append((node.strip(), int(node_port)))
+        else:
+            endpoints.append((item, int(port)))
+    if not endpoints:
+        raise ValueError("数据库地址不能为空")
+    return endpoints
+
+
+class _EndpointStats:
+    __slots__ = ('outstanding', 'latency', 'last_probe')
+
+    def __init__(self):
+        self.outstanding = 0
+        self.latency: float | None = None
+        self.last_probe = 0.0
+
+
+class ReplicaRouter:
+    """一组只读节点的路由与负载均衡"""
+
+    def __init__(self, db_type: str, database: str, endpoints: list[tuple[str, int]]):
+        self.db_type = db_type
+        self.database = database
+        self.endpoints = endpoints
+        self._stats = {ep: _EndpointStats() for ep in endpoints}
+        self._lock = threading.Lock()
+        self._rr = itertools.count()
+
+    def _key(self, endpoint: tuple[str, int]) -> tuple:
+        return target_key(self.db_type, endpoint[0], endpoint[1], self.database)
+
+    def order(self, policy: str) -> list[tuple[str, int]]:
+        """按路由策略给出候选节点顺序，熔断中的节点排在最后"""
+        self._maybe_probe()
+        with self._lock:
+            if policy == 'least_outstanding':
+                ranked = sorted(self.endpoints, key=lambda ep: self._stats[ep].outstanding)
+            elif policy == 'latency_weighted':
+                ranked = self._weighted_order()
+            else:
+                offset = next(self._rr) % len(self.endpoints)
+                ranked = self.endpoints[offset:] + self.endpoints[:offset]
+        healthy = [ep for ep in ranked if not breaker.is_open(self._key(ep))]
+        return healthy + [ep for ep in ranked if ep not in healthy]
+
+    def _weighted_order(self) -> list[tuple[str, int]]:
+        """按 1/延迟 加权随机选出首选节点，其余按延迟升序作为故障转移顺序"""
+        known = [s.latency for s in self._stats.values() if s.latency is not None]
+        default = sum(known) / len(known) if known else 1.0
+        latency = {
+            ep: max(self._stats[ep].latency or default, 1e-3)
+            for ep in self.endpoints
+        }
+        first = random.choices(
+            self.endpoints,
+            weights=[1 / latency[ep] for ep in self.endpoints]
+        )[0]
+        rest = sorted((ep for ep in self.endpoints if ep != first), key=latency.get)
+        return [first] + rest
+
+    @contextmanager
+    def track(self, endpoint: tuple[str, int]):
+        """记录节点在途请求数与耗时"""
+        stats = self._stats[endpoint]
+        with self._lock:
+            stats.outstanding += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - start
+            with self._lock:
+                stats.outstanding -= 1
+                stats.latency = (
+                    elapsed if stats.latency is None
+                    else _EWMA_ALPHA * elapsed + (1 - _EWMA_ALPHA) * stats.latency
+                )
+
+    def _maybe_probe(self) -> None:
+        """后台对过期节点做 TCP 健康检查，不可达的节点进入熔断"""
+        now = time.monotonic()
+        stale = []
+        with self._lock:
+            for ep, stats in self._stats.items():
+                if now - stats.last_probe >= HEALTH_CHECK_INTERVAL:
+                    stats.last_probe = now
+                    stale.append(ep)
+        if len(self.endpoints) > 1 and stale:
+            threading.Thread(target=self._probe, args=(stale,), daemon=True).start()
+
+    def _probe(self, endpoints: list[tuple[str, int]]) -> None:
+        for ep in endpoints:
+            try:
+                with socket.create_connection(ep, timeout=2):
+                    pass
+            except OSError as e:
+                breaker.record_failure(self._key(ep), DatabaseUnavailableError(f"健康检查失败: {e}"))
+
+
+_routers: dict[tuple, ReplicaRouter] = {}
+_routers_lock = threading.Lock()
+
+
+def get_router(db_type: str, database: str, endpoints: list[tuple[str, int]]) -> ReplicaRouter:
+    key = (db_type.lower(), database, tuple(endpoints))
+    with _routers_lock:
+        router = _routers.get(key)
+        if router is None:
+            router = ReplicaRouter(db_type, database, endpoints)
+            _routers[key] = router
+        return router
+
+
+def route_call(
+    db_type: str,
+    host: str,
+    port: int,
+    database: str,
+    call: Callable[[str, int], Any],
+    policy: str | None = None
+) -> Any:
+    """
+    在目标节点上执行 call(host, port)
+
+    host 可以是逗号分隔的多个只读节点，按 policy 选择节点；
+    节点不可达或排队已满时自动转移到下一个节点。
+    """
+    policy = (policy or DEFAULT_POLICY).lower()
+    if policy not in ROUTING_POLICIES:
+        raise ValueError(f"不支持的路由策略: {policy}。支持策略: {', '.join(sorted(ROUTING_POLICIES))}")
+
+    endpoints = parse_endpoints(host, port)
+    router = get_router(db_type, database, endpoints)
+    last_error: Exception | None = None
+    for node, node_port in router.order(policy):
+        try:
+            with guard(target_key(db_type, node, node_port, database)), \
+                    admit(db_type, node, node_port, database), \
+                    router.track((node, node_port)):
+                return call(node, node_port)
+        except (DatabaseUnavailableError, AdmissionRejected) as e:
+            if len(endpoints) > 1:
+                print(f"Failover from {node}:{node_port}: {str(e)}")
+            last_error = e
+
+    if len(endpoints) == 1:
+        raise last_error
+    raise DatabaseUnavailableError(f"所有数据库节点均不可用: {str(last_error)}")
@@ -0,0 +1,212 @@
+# utils/result_cache.py
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from typing import Any
+
+from database_schema.model import Schema, build_table
+
+# 所有会话缓存合计占用的内存上限（字节）
+MEMORY_BUDGET = int(os.getenv('ROOKIE_RESULT_CACHE_BYTES', 64 * 1024 * 1024))
+# 每个会话保留的结果表数量
+MAX_TABLES_PER_CONVERSATION = int(os.getenv('ROOKIE_RESULT_CACHE_TABLES', 8))
+# 单个结果超过该行数时不缓存
+MAX_ROWS = int(os.getenv('ROOKIE_RESULT_CACHE_MAX_ROWS', 200000))
+# SQL 前缀标记：带此标记的语句在本地缓存上执行
+CACHE_MARKER = '/* rookie:local_cache */'
+# 缓存查询只允许读取与函数调用（WITH RECURSIVE 需要 SQLITE_RECURSIVE）
+_ALLOWED_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+_LEADING_COMMENTS_RE = re.compile(r'^(?:\s+|/\*.*?\*/|--[^\n]*)*', re.S)
+
+
+def _sqlite_type(value: Any) -> str:
+    if isinstance(value, bool) or isinstance(value, int):
+        return 'INTEGER'
+    if isinstance(value, (float, Decimal)):
+        return 'REAL'
+    if isinstance(value, bytes):
+        return 'BLOB'
+    return 'TEXT'
+
+
+def _to_sqlite(value: Any) -> Any:
+    if value is None or isinstance(value, (int, float, str, bytes)):
+        return value
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(value, (date, dt_time)):
+        return value.isoformat()
+    return str(value)
+
+
+class ConversationCache:
+    """单个会话的内存结果库"""
+
+    def __init__(self):
+        self.conn = sqlite3.connect(':memory:', check_same_thread=False)
+        self.tables: OrderedDict[str, dict] = OrderedDict()
+        self.lock = threading.Lock()
+        self._seq = 0
+
+    def add(self, sql: str, rows: list[dict]) -> str:
+        """将结果写入新表，返回表名"""
+        columns, seen = [], set()
+        for col in rows[0].keys():
+            col_name = re.sub(r'\s+', '_', str(col)) or 'col'
+            while col_name.lower() in seen:
+                col_name += '_2'
+            seen.add(col_name.lower())
+            columns.append(col_name)
+
+        types = []
+        for key in rows[0].keys():
+            sample = next((row[key] for row in rows if row[key] is not None), None)
+            types.append(_sqlite_type(sample))
+
+        col_defs = ", ".join(f'"{c}" {t}' for c, t in zip(columns, types))
+        placeholders = ", ".join("?" for _ in columns)
+        with self.lock:
+            self._seq += 1
+            name = f"r{self._seq}"
+            self.conn.execute(f'CREATE TABLE "{name}" ({col_defs})')
+            self.conn.executemany(
+                f'INSERT INTO "{name}" VALUES ({placeholders})',
+                ([_to_sqlite(v) for v in row.values()] for row in rows)
+            )
+            self.conn.commit()
+            self.tables[name] = {
+                'sql': sql,
+                'columns': columns,
+                'types': types,
+                'row_count': len(rows),
+                'created_at': time.time()
+            }
+        return name
+
+    def drop_oldest(self) -> None:
+        with self.lock:
+            name, _ = self.tables.popitem(last=False)
+            self.conn.execute(f'DROP TABLE "{name}"')
+            self.conn.execute('VACUUM')
+
+    def size(self) -> int:
+        with self.lock:
+            page_count = self.conn.execute('PRAGMA page_count').fetchone()[0]
+            page_size = self.conn.execute('PRAGMA page_size').fetchone()[0]
+        return page_count * page_size
+
+    def schema(self) -> Schema:
+        """以 get_db_schema 的结构描述缓存表，可直接用于 format_schema_dsl 与 SQL 校验"""
+        return Schema(tuple(
+            build_table(
+                name,
+                comment=f"来自查询: {meta['sql']}",
+                columns=[
+                    {'name': c, 'type': t}
+                    for c, t in zip(meta['columns'], meta['types'])
+                ]
+            )
+            for name, meta in self.tables.items()
+        ))
+
+    def query(self, sql: str, params: dict | None = None) -> list[dict]:
+        """
+        执行单条 SELECT / WITH 查询
+
+        执行期间开启 query_only、禁止附加数据库并安装授权回调，拒绝 ATTACH、PRAGMA 与所有写操作；
+        这些限制只在查询期间生效，VACUUM 等缓存自身的维护操作仍需要临时附加数据库
+        """
+        statement = _LEADING_COMMENTS_RE.sub('', sql, count=1)
+        first_token = re.match(r'\w+', statement)
+        if not first_token or first_token.group(0).upper() not in ('SELECT', 'WITH'):
+            raise ValueError("本地结果缓存只支持单条 SELECT / WITH 查询")
+        with self.lock:
+            self.conn.execute('PRAGMA query_only = ON')
+            attached_limit = self.conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, 0)
+            self.conn.set_authorizer(_authorize_read)
+            try:
+                # sqlite3 一次只执行一条语句，多条语句会抛出 ProgrammingError
+                cursor = self.conn.execute(sql, params or {})
+                columns = [d[0] for d in cursor.description or []]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+            except (sqlite3.DatabaseError, sqlite3.ProgrammingError) as e:
+                raise ValueError(f"本地结果缓存查询失败: {str(e)}")
+            finally:
+                self.conn.set_authorizer(None)
+                self.conn.setlimit(sqlite3.SQLITE_LIMIT_ATTACHED, attached_limit)
+                self.conn.execute('PRAGMA query_only = OFF')
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def _authorize_read(action: int, arg1, arg2, db_name, trigger) -> int:
+    return sqlite3.SQLITE_OK if action in _ALLOWED_ACTIONS else sqlite3.SQLITE_DENY
+
+
+_caches: OrderedDict[str, ConversationCache] = OrderedDict()
+_caches_lock = threading.Lock()
+
+
+def store_result(cache_key: str, sql: str, rows: list[dict]) -> str | None:
+    """
+    缓存一次查询结果，按会话保留最近的结果表，超出内存预算时按最近最少使用淘汰
+
+    :return: 缓存表名，结果为空或过大时返回 None
+    """
+    if not cache_key or not rows or len(rows) > MAX_ROWS:
+        return None
+    with _caches_lock:
+        cache = _caches.get(cache_key)
+        if cache is None:
+            cache = ConversationCache()
+            _caches[cache_key] = cache
+        _caches.move_to_end(cache_key)
+
+    name = cache.add(sql, rows)
+    while len(cache.tables) > MAX_TABLES_PER_CONVERSATION:
+        cache.drop_oldest()
+    _enforce_budget(cache_key)
+    return name if name in cache.tables else None
+
+
+def get_cache(cache_key: str) -> ConversationCache | None:
+    if not cache_key:
+        return None
+    with _caches_lock:
+        cache = _caches.get(cache_key)
+        if cache is not None:
+            _caches.move_to_end(cache_key)
+        return cache if cache is not None and cache.tables else None
+
+
+def _enforce_budget(current_key: str) -> None:
+    """先淘汰其他会话，再淘汰当前会话中较早的结果表"""
+    with _caches_lock:
+        sizes = {key: cache.size() for key, cache in _caches.items()}
+        total = sum(sizes.values())
+        for key in list(_caches.keys()):
+            if total <= MEMORY_BUDGET:
+                return
+            if key == current_key:
+                continue
+            _caches.pop(key).close()
+            total -= sizes[key]
+
+        cache = _caches.get(current_key)
+        while cache is not None and total > MEMORY_BUDGET and cache.tables:
+            cache.drop_oldest()
+            total = cache.size()
+        if cache is not None and not cache.tables:
+            _caches.pop(current_key).close()
+
+
+def is_cache_sql(sql: str) -> bool:
+    return sql.lstrip().startswith(CACHE_MARKER)
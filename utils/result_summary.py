@@ -0,0 +1,130 @@
+# utils/result_summary.py
+from collections import deque
+from collections.abc import Callable, Iterable
+from typing import Any
+
+# 单列精确统计去重值的上限，超过后显示为 ">=上限"
+DISTINCT_LIMIT = 10000
+
+
+class _ColumnStats:
+    __slots__ = ('count', 'nulls', 'min', 'max', 'distinct', 'overflow', 'comparable')
+
+    def __init__(self):
+        self.count = 0
+        self.nulls = 0
+        self.min = None
+        self.max = None
+        self.distinct: set = set()
+        self.overflow = False
+        self.comparable = True
+
+    def add(self, value: Any) -> None:
+        self.count += 1
+        if value is None:
+            self.nulls += 1
+            return
+        if not self.overflow:
+            try:
+                self.distinct.add(value)
+            except TypeError:
+                self.distinct.add(repr(value))
+            if len(self.distinct) >= DISTINCT_LIMIT:
+                self.overflow = True
+        if self.comparable:
+            try:
+                if self.min is None or value < self.min:
+                    self.min = value
+                if self.max is None or value > self.max:
+                    self.max = value
+            except TypeError:
+                self.comparable = False
+                self.min = self.max = None
+
+
+def summarize_rows(
+    rows: Iterable[dict],
+    max_chars: int = 4000,
+    head: int = 5,
+    tail: int = 5,
+    formatter: Callable[[Any], Any] = str,
+    header: str = ''
+) -> str:
+    """
+    单次遍历生成结果摘要：字段、首尾样本行与逐列统计（非空数、空值率、最小/最大值、去重数）
+
+    输出总长度不超过 max_chars，超出时逐步减少样本行，仍超出时截断。
+    """
+    columns: list[str] = []
+    stats: list[_ColumnStats] = []
+    head_rows: list[tuple] = []
+    tail_rows: deque = deque(maxlen=tail)
+    total = 0
+    for row in rows:
+        if total == 0:
+            columns = list(row.keys())
+            stats = [_ColumnStats() for _ in columns]
+        values = tuple(row.values())
+        for col_stats, value in zip(stats, values):
+            col_stats.add(value)
+        if len(head_rows) < head:
+            head_rows.append(values)
+        else:
+            tail_rows.append(values)
+        total += 1
+
+    stat_lines = _render_stats(columns, stats, total, formatter)
+    sample_head, sample_tail = head_rows, list(tail_rows)
+    while True:
+        text = _render(header, columns, total, sample_head, sample_tail, stat_lines, formatter)
+        if len(text) <= max_chars or not (sample_head or sample_tail):
+            break
+        # 优先减少样本行，尾部先减
+        if len(sample_tail) >= len(sample_head):
+            sample_tail = sample_tail[1:]
+        else:
+            sample_head = sample_head[:-1]
+    if len(text) > max_chars:
+        text = text[:max(max_chars - 15, 0)] + "\n...（摘要已截断）"
+    return text
+
+
+def _render_stats(columns: list[str], stats: list[_ColumnStats], total: int,
+                  formatter: Callable[[Any], Any]) -> list[str]:
+    lines = []
+    for name, col_stats in zip(columns, stats):
+        non_null = col_stats.count - col_stats.nulls
+        null_ratio = col_stats.nulls / total if total else 0
+        distinct = f">={DISTINCT_LIMIT}" if col_stats.overflow else str(len(col_stats.distinct))
+        parts = [f"非空 {non_null}", f"空值率 {null_ratio:.1%}", f"去重 {distinct}"]
+        if col_stats.comparable and col_stats.min is not None:
+            parts.append(f"最小 {_cell(col_stats.min, formatter)}")
+            parts.append(f"最大 {_cell(col_stats.max, formatter)}")
+        lines.append(f"- {name}: {', '.join(parts)}")
+    return lines
+
+
+def _render(header: str, columns: list[str], total: int, head_rows: list[tuple],
+            tail_rows: list[tuple], stat_lines: list[str], formatter: Callable[[Any], Any]) -> str:
+    lines = [header] if header else []
+    lines.append(f"共 {total} 行，{len(columns)} 列")
+    lines.append("字段: " + " | ".join(columns))
+    lines.append("样本:")
+    lines.extend(_row_line(row, formatter) for row in head_rows)
+    omitted = total - len(head_rows) - len(tail_rows)
+    if omitted > 0:
+        lines.append(f"...（省略 {omitted} 行）...")
+    lines.extend(_row_line(row, formatter) for row in tail_rows)
+    lines.append("字段统计:")
+    lines.extend(stat_lines)
+    return "\n".join(lines)
+
+
+def _row_line(row: tuple, formatter: Callable[[Any], Any]) -> str:
+    return " | ".join(_cell(value, formatter) for value in row)
+
+
+def _cell(value: Any, formatter: Callable[[Any], Any], width: int = 64) -> str:
+    text = 'NULL' if value is None else str(value if isinstance(value, (int, float, str)) else formatter(value))
+    text = text.replace('\n', ' ')
+    return text if len(text) <= width else text[:width - 1] + '…'
@@ -0,0 +1,304 @@
+# utils/sql_validator.py
+import re
+
+from database_schema.model import Schema, as_schema
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<string>[Ee]'(?:[^'\\]|\\.|'')*'|[NnXxBb]?'(?:[^']|'')*')
+  | (?P<dquote>"(?:[^"]|"")*")
+  | (?P<bquote>`[^`]*`)
+  | (?P<bracket>\[[^\]]*\])
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)
+  | (?P<cast>::)
+  | (?P<param>:[^\W\d]\w*|:\d+|\$\d+|@@?\w+|\?|%\(\w+\)s)
+  | (?P<ident>[^\W\d]\w*[$#]*)
+  | (?P<punct>[(),.;*])
+  | (?P<op>.)
+""", re.X | re.S)
+# MySQL 字符串中的反斜杠转义引号，不按转义切分会把 'x\''; DROP ... 中后续的语句当成字符串
+_MYSQL_TOKEN_RE = re.compile(
+    _TOKEN_RE.pattern.replace(r"[NnXxBb]?'(?:[^']|'')*'", r"[NnXxBb]?'(?:[^'\\]|\\.|'')*'"),
+    re.X | re.S
+)
+
+# 非字段标识符：关键字、类型名、日期单位、伪列等
+KEYWORDS = frozenset("""
+    SELECT FROM WHERE AND OR NOT IN IS NULL AS ON USING JOIN INNER LEFT RIGHT FULL OUTER CROSS
+    NATURAL APPLY LATERAL ONLY GROUP BY ORDER HAVING LIMIT OFFSET FETCH FIRST NEXT ROWS ROW
+    TOP PERCENT TIES DISTINCT ALL ANY SOME EXISTS BETWEEN LIKE ILIKE ESCAPE SIMILAR REGEXP RLIKE
+    CASE WHEN THEN ELSE END CAST CONVERT TRY_CONVERT UNION INTERSECT EXCEPT MINUS WITH RECURSIVE
+    ASC DESC NULLS LAST OVER PARTITION WINDOW RANGE UNBOUNDED PRECEDING FOLLOWING CURRENT
+    FILTER WITHIN SEPARATOR COLLATE AT TIME ZONE INTERVAL DIV MOD TRUE FALSE UNKNOWN
+    YEAR QUARTER MONTH WEEK DAY HOUR MINUTE SECOND MICROSECOND MILLISECOND EPOCH DOW DOY ISODOW
+    DAYOFWEEK DAYOFYEAR YY YYYY QQ MM DD WK HH MI SS MS DW DY
+    WEEKDAY ISO_WEEK ISOWK ISOWW WW MCS NANOSECOND NS TZOFFSET TZ DAYOFMONTH
+    ISOYEAR CENTURY DECADE MILLENNIUM MICROSECONDS MILLISECONDS TIMEZONE_HOUR TIMEZONE_MINUTE
+    INT INTEGER BIGINT SMALLINT TINYINT NUMERIC DECIMAL NUMBER FLOAT REAL DOUBLE PRECISION
+    CHAR NCHAR VARCHAR NVARCHAR VARCHAR2 NVARCHAR2 TEXT DATE DATETIME DATETIME2 TIMESTAMP
+    BOOLEAN BOOL SIGNED UNSIGNED BINARY JSON JSONB UUID MAX ARRAY
+    CURRENT_DATE CURRENT_TIME CURRENT_TIMESTAMP LOCALTIME LOCALTIMESTAMP SYSDATE SYSTIMESTAMP
+    ROWNUM ROWID LEVEL PRIOR CONNECT START SIBLINGS QUALIFY NOLOCK READUNCOMMITTED
+    FOR UPDATE SHARE NOWAIT SKIP LOCKED OF BOTH LEADING TRAILING DUAL HASH LOOP MERGE REMOTE
+""".split())
+
+# 结束一个表达式的关键字，其后紧跟的标识符是别名
+_OPERAND_KEYWORDS = frozenset({'END', 'NULL', 'TRUE', 'FALSE', 'CURRENT_DATE',
+                               'CURRENT_TIMESTAMP', 'SYSDATE', 'SYSTIMESTAMP', 'ROWNUM'})
+# 结束 FROM 列表的子句关键字
+_CLAUSE_KEYWORDS = frozenset({'WHERE', 'GROUP', 'ORDER', 'HAVING', 'ON', 'USING', 'UNION',
+                              'INTERSECT', 'EXCEPT', 'MINUS', 'LIMIT', 'FETCH', 'OFFSET',
+                              'WINDOW', 'CONNECT', 'START', 'QUALIFY', 'SELECT', 'FOR'})
+_SYSTEM_SCHEMAS = frozenset({'information_schema', 'pg_catalog', 'sys', 'mysql',
+                             'performance_schema'})
+
+
+def _tokenize(sql: str, db_type: str | None) -> list[tuple[str, str, bool]]:
+    """切分为 (类型, 值, 是否引号标识符)"""
+    tokens = []
+    for m in (_MYSQL_TOKEN_RE if db_type == 'mysql' else _TOKEN_RE).finditer(sql):
+        kind = m.lastgroup
+        value = m.group()
+        if kind in ('ws', 'comment'):
+            continue
+        if kind == 'dquote':
+            # MySQL 默认将双引号视为字符串
+            if db_type == 'mysql':
+                tokens.append(('string', value, False))
+            else:
+                tokens.append(('ident', value[1:-1].replace('""', '"'), True))
+        elif kind == 'bracket' and db_type in ('postgresql', 'mysql', 'oracle'):
+            # 只有 SQL Server 用方括号引用标识符，其他方言中是数组下标或 ARRAY[...] 构造
+            tokens.append(('op', '[', False))
+            tokens.extend(_tokenize(value[1:-1], db_type))
+            tokens.append(('op', ']', False))
+        elif kind in ('bquote', 'bracket'):
+            tokens.append(('ident', value[1:-1], True))
+        else:
+            tokens.append((kind, value, False))
+    return tokens
+
+
+def _is_kw(tok: tuple | None, *words: str) -> bool:
+    return (
+        tok is not None and tok[0] == 'ident' and not tok[2]
+        and tok[1].upper() in words
+    )
+
+
+def _is_name(tok: tuple | None) -> bool:
+    """非关键字标识符"""
+    return (
+        tok is not None and tok[0] == 'ident'
+        and (tok[2] or tok[1].upper() not in KEYWORDS)
+    )
+
+
+def _ends_operand(tok: tuple | None) -> bool:
+    if tok is None:
+        return False
+    if tok[0] in ('string', 'number', 'param'):
+        return True
+    if tok == ('punct', ')', False):
+        return True
+    return _is_name(tok) or _is_kw(tok, *_OPERAND_KEYWORDS)
+
+
+def validate_sql(sql: str, schema: Schema | dict, db_type: str | None = None) -> list[str]:
+    """
+    基于反射的表结构校验 SQL 中引用的表和字段
+
+    :param sql: 待校验的 SELECT 语句
+    :param schema: get_db_schema 返回的结构
+    :param db_type: 数据库类型，用于区分标识符引号规则
+    :return: 错误信息列表，为空表示校验通过
+    """
+    db_type = (db_type or '').lower()
+    tables = {
+        name.lower(): {col.lower() for col in table.column_names}
+        for name, table in as_schema(schema).items()
+    }
+    tokens = _tokenize(sql, db_type)
+    n = len(tokens)
+    tok = lambda k: tokens[k] if 0 <= k < n else None
+
+    errors: list[str] = []
+    ctes: set[str] = set()
+    derived_names: set[str] = set()   # 别名、CTE 列名等非物理字段名
+    aliases: dict[str, str | None] = {}   # 别名/表名 -> 物理表（None 表示无法校验的来源）
+    consumed: set[int] = set()
+    unverifiable = False
+
+    # 预扫描：CTE 名称与别名定义
+    for i, t in enumerate(tokens):
+        if _is_kw(t, 'AS') and tok(i + 1) == ('punct', '(', False) \
+                and _is_kw(tok(i + 2), 'SELECT', 'WITH'):
+            prev = tok(i - 1)
+            if prev == ('punct', ')', False):
+                # name (c1, c2) AS (...)
+                j, depth = i - 1, 0
+                while j >= 0:
+                    if tokens[j] == ('punct', ')', False):
+                        depth += 1
+                    elif tokens[j] == ('punct', '(', False):
+                        depth -= 1
+                        if depth == 0:
+                            break
+                    elif tokens[j][0] == 'ident':
+                        derived_names.add(tokens[j][1].lower())
+                    j -= 1
+                prev = tok(j - 1)
+            if prev is not None and prev[0] == 'ident':
+                ctes.add(prev[1].lower())
+        elif t[0] == 'ident' and tok(i - 1) != ('punct', '.', False) \
+                and tok(i + 1) != ('punct', '.', False) \
+                and (_is_kw(tok(i - 1), 'AS') or (_is_name(t) and _ends_operand(tok(i - 1)))):
+            derived_names.add(t[1].lower())
+
+    # 解析 FROM / JOIN 中的表引用
+    paren_stack: list[bool] = []          # 每层括号是否为子查询
+    derived_parens: list[int] = []        # 作为派生表的括号层级
+    from_depth: int | None = None
+    expect_table = False
+    i = 0
+    while i < n:
+        t = tokens[i]
+        if t == ('punct', '(', False):
+            is_query = _is_kw(tok(i + 1), 'SELECT', 'WITH')
+            paren_stack.append(is_query)
+            if expect_table and is_query:
+                derived_parens.append(len(paren_stack))
+                expect_table = False
+            i += 1
+            continue
+        if t == ('punct', ')', False):
+            depth = len(paren_stack)
+            if paren_stack:
+                paren_stack.pop()
+            if from_depth is not None and from_depth >= depth:
+                from_depth = None
+            if derived_parens and derived_parens[-1] == depth:
+                derived_parens.pop()
+                k = i + 2 if _is_kw(tok(i + 1), 'AS') else i + 1
+                if _is_name(tok(k)):
+                    aliases[tokens[k][1].lower()] = None
+                    consumed.add(k)
+            i += 1
+            continue
+
+        if _is_kw(t, 'FROM') and (not paren_stack or paren_stack[-1]):
+            expect_table = True
+            from_depth = len(paren_stack)
+        elif _is_kw(t, 'JOIN', 'APPLY'):
+            expect_table = True
+        elif t == ('punct', ',', False) and from_depth == len(paren_stack):
+            expect_table = True
+        elif _is_kw(t, *_CLAUSE_KEYWORDS) and from_depth == len(paren_stack):
+            from_depth = None
+        elif expect_table and t[0] == 'ident' and not _is_kw(t, 'LATERAL', 'ONLY'):
+            # 表名（可带 schema 前缀）
+            parts, j = [t[1]], i + 1
+            while tok(j) == ('punct', '.', False) and tok(j + 1) and tokens[j + 1][0] == 'ident':
+                parts.append(tokens[j + 1][1])
+                j += 2
+            consumed.update(range(i, j))
+            table = parts[-1].lower()
+            if tok(j) == ('punct', '(', False):
+                # 表值函数
+                target, unverifiable = None, True
+            elif len(parts) > 1 and parts[-2].lower() in _SYSTEM_SCHEMAS:
+                target, unverifiable = None, True
+            elif table in ctes:
+                target = None
+            elif table in tables:
+                target = table
+            elif table == 'dual':
+                target = None
+            else:
+                errors.append(f"表 {'.'.join(parts)} 不存在")
+                target, unverifiable = None, True
+            aliases[table] = target
+            k = j + 1 if _is_kw(tok(j), 'AS') else j
+            if _is_name(tok(k)) and not _is_kw(tok(k), *_CLAUSE_KEYWORDS):
+                aliases[tokens[k][1].lower()] = target
+                consumed.add(k)
+                j = k + 1
+            expect_table = False
+            i = j
+            continue
+        i += 1
+
+    # 校验字段引用
+    known_columns = set().union(*(tables[t] for t in aliases.values() if t))
+    i = 0
+    while i < n:
+        t = tokens[i]
+        if t[0] != 'ident' or i in consumed or tok(i - 1) == ('punct', '.', False):
+            i += 1
+            continue
+        if not t[2] and (t[1].upper() in KEYWORDS or tok(i + 1) == ('punct', '(', False)):
+            i += 1
+            continue
+        if tok(i - 1) == ('cast', '::', False):
+            i += 1
+            continue
+
+        if tok(i + 1) == ('punct', '.', False):
+            # 限定字段 alias.col / schema.table.col
+            parts, j = [t[1]], i + 1
+            while tok(j) == ('punct', '.', False) and tok(j + 1) is not None:
+                parts.append(tokens[j + 1][1])
+                j += 2
+            i = j
+            if len(parts) < 2 or parts[-1] == '*' or tok(j) == ('punct', '(', False):
+                continue
+            qualifier, column = parts[-2].lower(), parts[-1]
+            if qualifier in aliases:
+                target = aliases[qualifier]
+            elif qualifier in tables:
+                target = qualifier
+            elif qualifier in ctes:
+                continue
+            else:
+                errors.append(f"未知的表或别名 {parts[-2]}（引用 {'.'.join(parts)}）")
+                continue
+            if target and column.lower() not in tables[target]:
+                errors.append(f"字段 {parts[-2]}.{column} 不存在于表 {target}")
+            continue
+
+        name = t[1].lower()
+        if not (name in derived_names or name in aliases or name in ctes
+                or unverifiable or not known_columns or name in known_columns):
+            errors.append(f"字段 {t[1]} 不存在于引用的表中")
+        i += 1
+
+    return list(dict.fromkeys(errors))
+
+
+# 只读语句允许的首个关键字
+READ_ONLY_KEYWORDS = frozenset({'SELECT', 'WITH', 'SHOW', 'DESC', 'DESCRIBE'})
+# 出现在语句任意位置即视为写操作：CTE 中的 DML、SELECT INTO、FOR UPDATE 加锁读等
+WRITE_KEYWORDS = frozenset({'INSERT', 'UPDATE', 'DELETE', 'MERGE', 'UPSERT', 'DROP', 'ALTER',
+                            'TRUNCATE', 'CREATE', 'GRANT', 'REVOKE', 'INTO'})
+
+
+def is_read_only_sql(sql: str, db_type: str | None = None) -> bool:
+    """
+    是否为单条只读语句
+
+    按词法切分判断，字符串、注释与引号标识符中的内容不参与匹配；
+    拒绝多条语句、以非查询关键字开头的语句（包括 EXPLAIN ANALYZE，它会真正执行语句）
+    以及任意位置出现写操作关键字的语句。MySQL 的 /*! */ 注释会被执行，一律拒绝。
+    """
+    db_type = (db_type or '').lower()
+    if '/*!' in sql:
+        return False
+    tokens = _tokenize(sql, db_type)
+    while tokens and tokens[-1] == ('punct', ';', False):
+        tokens.pop()
+    if not tokens or ('punct', ';', False) in tokens:
+        return False
+    if not _is_kw(tokens[0], *READ_ONLY_KEYWORDS):
+        return False
+    return not any(_is_kw(t, *WRITE_KEYWORDS) for t in tokens)